@@ -1,15 +1,28 @@
 import os
+import time
+import threading
 import secrets
 from dotenv import load_dotenv
 from pymongo import MongoClient
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from flask import Flask, request, jsonify, render_template, send_from_directory, session, redirect, url_for
+from flask import before_render_template, template_rendered
 from flask_cors import CORS
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from bson import ObjectId
 from werkzeug.utils import secure_filename
 from flask_bcrypt import Bcrypt
 from functools import wraps
+from forecast import forecast_demand
+from request_profiler import CommandProfiler
+from sale_docs import build_sale
+from sales_series import sales_series, GRANULARITIES, GROUP_FIELDS
+from menu_catalog import MASTER_MENU, EXPORT_FIELDS, to_csv, parse_rows, diff_menu
+from inventory import parse_counts, record_counts, set_recipe, inventory_status
+from price_history import prices_as_of, price_timeline, offer_impact
+from outlets import DEFAULT_OUTLET_ID, outlet_match
+from mongo_storage import MongoStorage
+from sqlite_storage import SQLiteStorage
 
 load_dotenv()
 
@@ -35,144 +48,54 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# MongoDB Setup
+# Storage Setup
+# STORAGE_BACKEND=sqlite keeps the catalog, sales and users in one local file
+# (a single counter, tests, benchmarks) and never connects to MongoDB; the
+# analytics that need MongoDB then answer 501.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo").lower()
 MONGO_URI = os.getenv("MONGO_URI")
 
-client = MongoClient(MONGO_URI)
+# Request profiling: every Mongo command is attributed to the request that
+# issued it. Requests over the round-trip budget are logged; admins can add
+# ?profile=1 (or an X-Profile: 1 header) to get a Server-Timing header back.
+DB_ROUNDTRIP_BUDGET = int(os.getenv("DB_ROUNDTRIP_BUDGET", 3))
+PROFILE_ALL_REQUESTS = os.getenv("PROFILE_ALL_REQUESTS", "False").lower() == "true"
+db_profiler = CommandProfiler()
+before_render_template.connect(db_profiler.render_started, app)
+template_rendered.connect(db_profiler.render_finished, app)
 
-# Test Connection (Very Important)
-try:
-    client.admin.command('ping')
-    print("✅ MongoDB Connected Successfully!")
-except Exception as e:
-    print("❌ MongoDB Connection Failed:", e)
+if STORAGE_BACKEND == "sqlite":
+    store = SQLiteStorage(os.getenv("SQLITE_PATH", os.path.join(BASE_DIR, "cafe.db")))
+    db = None
+    print("✅ Using local SQLite storage:", store.path)
+else:
+    client = MongoClient(MONGO_URI, event_listeners=[db_profiler])
 
-db = client.get_database()
-menu_items = db.menu_items
-sales = db.sales
-users = db.users
+    # Test Connection (Very Important)
+    try:
+        client.admin.command('ping')
+        print("✅ MongoDB Connected Successfully!")
+    except Exception as e:
+        print("❌ MongoDB Connection Failed:", e)
+
+    db = client.get_database()
+    # Sales are journaled here first and shipped to MongoDB in the background
+    SALE_JOURNAL_PATH = os.getenv("SALE_JOURNAL_PATH", os.path.join(BASE_DIR, "sale_journal.db"))
+    store = MongoStorage(db, SALE_JOURNAL_PATH)
 
-# Ensure Unique Index on Name
-menu_items.create_index("name", unique=True)
+store.setup()
+
+def bump_catalog_version():
+    store.bump_catalog_version()
+
+def catalog_version():
+    return store.catalog_version()
 
 def sync_menu_items():
-    from datetime import datetime
-    
-    # 1. Initialize default fields for existing items if they don't exist
-    menu_items.update_many({"is_active": {"$exists": False}}, {"$set": {"is_active": True}})
-    menu_items.update_many({"order_count": {"$exists": False}}, {"$set": {"order_count": 0}})
-    menu_items.update_many({"created_at": {"$exists": False}}, {"$set": {"created_at": datetime.now()}})
-    menu_items.update_many({"updated_at": {"$exists": False}}, {"$set": {"updated_at": datetime.now()}})
-    
-    # 2. Get existing names
-    existing_names = set(
-        item["name"] for item in menu_items.find({}, {"name": 1})
-    )
-
-    MASTER_MENU = [
-        # MILKSHAKES (25)
-        {"name": "Oreo Milkshake", "category": "Milkshakes", "price": 100, "description": "Rich and creamy milkshake featuring Oreo cookies blended with chilled milk."},
-        {"name": "Belgian Dark Chocolate Milkshake", "category": "Milkshakes", "price": 100, "description": "Premium dark chocolate blended into a smooth and indulgent shake."},
-        {"name": "Dry Fruit Milkshake", "category": "Milkshakes", "price": 150, "description": "Energy-packed milkshake blended with cashews, almonds, pistachios and chilled milk."},
-        {"name": "Brownie Milkshake", "category": "Milkshakes", "price": 120, "description": "Chocolate brownie blended with creamy milk for a rich dessert-style shake."},
-        {"name": "Strawberry Milkshake", "category": "Milkshakes", "price": 80, "description": "Fresh strawberry flavored shake, smooth and refreshing."},
-        {"name": "Watermelon Milkshake", "category": "Milkshakes", "price": 80, "description": "Light and refreshing milkshake made with chilled watermelon."},
-        {"name": "Blueberry Milkshake", "category": "Milkshakes", "price": 90, "description": "Sweet and tangy blueberry milkshake with smooth texture."},
-        {"name": "Black Current Milkshake", "category": "Milkshakes", "price": 90, "description": "Fruity and refreshing black currant flavored milkshake."},
-        {"name": "Butterscotch Milkshake", "category": "Milkshakes", "price": 80, "description": "Classic butterscotch flavor blended into creamy chilled milk."},
-        {"name": "Mango Milkshake", "category": "Milkshakes", "price": 80, "description": "Sweet tropical mango milkshake made with fresh mango crush."},
-        {"name": "Orange Milkshake", "category": "Milkshakes", "price": 80, "description": "Citrusy orange milkshake blended into creamy milk."},
-        {"name": "Banana Milkshake", "category": "Milkshakes", "price": 80, "description": "Creamy banana blended with milk for natural sweetness."},
-        {"name": "Vanilla Milkshake", "category": "Milkshakes", "price": 80, "description": "Classic vanilla flavored creamy milkshake."},
-        {"name": "Pineapple Milkshake", "category": "Milkshakes", "price": 80, "description": "Refreshing pineapple crush blended into chilled milk."},
-        {"name": "Guava Milkshake", "category": "Milkshakes", "price": 80, "description": "Sweet guava blended into a smooth and fruity shake."},
-        {"name": "Kiwi Milkshake", "category": "Milkshakes", "price": 80, "description": "Tangy kiwi flavored refreshing milkshake."},
-        {"name": "Kolkata Pan Milkshake", "category": "Milkshakes", "price": 100, "description": "Milkshake infused with traditional paan flavor."},
-        {"name": "Pista Milkshake", "category": "Milkshakes", "price": 80, "description": "Creamy pistachio flavored milkshake."},
-        {"name": "Banana Bonkers Milkshake", "category": "Milkshakes", "price": 90, "description": "Banana based milkshake with enhanced sweetness."},
-        {"name": "Kitkat Milkshake", "category": "Milkshakes", "price": 100, "description": "Creamy chocolate milkshake blended with Kitkat pieces."},
-        {"name": "5 Star Chocolate Milkshake", "category": "Milkshakes", "price": 100, "description": "Chocolate milkshake blended with 5 Star chocolate."},
-        {"name": "Gems Milkshake", "category": "Milkshakes", "price": 100, "description": "Colorful Gems chocolate blended into a creamy milkshake."},
-        {"name": "Snickers Milkshake", "category": "Milkshakes", "price": 100, "description": "Snickers chocolate blended into rich milkshake."},
-        {"name": "Choco Butterscotch Milkshake", "category": "Milkshakes", "price": 100, "description": "Butterscotch and chocolate blended into creamy milk."},
-        {"name": "Choco-nut Crunch Supreme", "category": "Milkshakes", "price": 120, "description": "Chocolate and nut infused premium thick milkshake."},
-
-        # ICE CREAM SHAKES (23)
-        {"name": "Kitkat Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Ice cream blended with Kitkat chocolate and milk."},
-        {"name": "Mango Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Mango flavored ice cream blended into thick shake."},
-        {"name": "Belgian Dark Chocolate Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Premium Belgian chocolate ice cream blended smoothly."},
-        {"name": "Blended Brownie Ice Cream Shake", "category": "Ice Cream Shakes", "price": 180, "description": "Chocolate brownie blended with creamy ice cream."},
-        {"name": "Gems Ice Cream Shake", "category": "Ice Cream Shakes", "price": 80, "description": "Ice cream blended with Gems chocolates."},
-        {"name": "Black Current Ice Cream Shake", "category": "Ice Cream Shakes", "price": 80, "description": "Black currant ice cream blended into smooth shake."},
-        {"name": "Butterscotch Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Butterscotch ice cream blended into creamy shake."},
-        {"name": "Watermelon Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Watermelon flavored ice cream blended with milk."},
-        {"name": "Pineapple Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Pineapple flavored ice cream blended smoothly."},
-        {"name": "Guava Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Guava flavored ice cream blended creamy."},
-        {"name": "Vanilla Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Classic vanilla ice cream blended shake."},
-        {"name": "Orange Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Citrusy orange flavored ice cream shake."},
-        {"name": "Banana Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Banana flavored creamy ice cream shake."},
-        {"name": "Strawberry Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Strawberry ice cream blended into thick shake."},
-        {"name": "Kiwi Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Kiwi flavored ice cream blended smoothly."},
-        {"name": "Kolkata Pan Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Paan flavored ice cream blended shake."},
-        {"name": "Pista Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Pistachio ice cream blended into creamy shake."},
-        {"name": "Blueberry Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Blueberry flavored ice cream shake."},
-        {"name": "Chocolate Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Chocolate ice cream blended into smooth shake."},
-        {"name": "Banana Bonkers Ice Cream Shake", "category": "Ice Cream Shakes", "price": 170, "description": "Banana ice cream shake topped with chocolate."},
-        {"name": "5 Star Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "5 Star chocolate blended into ice cream shake."},
-        {"name": "Choco Butterscotch Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Chocolate and butterscotch blended ice cream shake."},
-        {"name": "Belgian Dark Chocolate Ice Cream Shake (Special)", "category": "Ice Cream Shakes", "price": 150, "description": "Premium Belgian chocolate ice cream blend."},
-
-        # SNACKS (6)
-        {"name": "Peri Peri French Fries", "category": "Snacks", "price": 100, "description": "Crispy fries coated in peri peri spice blend."},
-        {"name": "Masala Fries", "category": "Snacks", "price": 70, "description": "Classic fries tossed with spicy masala seasoning."},
-        {"name": "Peri Smilies", "category": "Snacks", "price": 50, "description": "Smiley shaped potato snacks with peri peri flavor."},
-        {"name": "Cheesy Fries", "category": "Snacks", "price": 150, "description": "Loaded fries topped with melted cheese."},
-        {"name": "Classic Salted Smilies", "category": "Snacks", "price": 50, "description": "Golden fried smiley potatoes lightly salted."},
-        {"name": "Classic Salted French Fries", "category": "Snacks", "price": 85, "description": "Classic salted crispy French fries."},
-
-        # COMBO OFFERS (5)
-        {"name": "Mango Milkshake + French Fries", "category": "Combo Offers", "price": 140, "description": "Sweet mango milkshake paired with crispy fries."},
-        {"name": "Watermelon Milkshake + Classic French Fries", "category": "Combo Offers", "price": 140, "description": "Refreshing watermelon shake with salted fries."},
-        {"name": "Vanilla Milkshake + Classic French Fries", "category": "Combo Offers", "price": 140, "description": "Classic vanilla shake with crispy fries."},
-        {"name": "Chocolate Milkshake + Classic French Fries", "category": "Combo Offers", "price": 160, "description": "Chocolate milkshake served with fries."},
-        {"name": "Orange Milkshake + Classic French Fries", "category": "Combo Offers", "price": 140, "description": "Citrusy orange milkshake paired with salted fries."}
-    ]
-
-    # 3. Synchronize Master Menu
-    all_items = list(menu_items.find().sort("item_id", -1).limit(1))
-    next_id = 1
-    if all_items:
-        last_id = all_items[0].get("item_id", 0)
-        if isinstance(last_id, int):
-            next_id = last_id + 1
-        else:
-            next_id = menu_items.count_documents({}) + 1
-
-    for item in MASTER_MENU:
-        if item["name"] not in existing_names:
-            item["item_id"] = next_id
-            item["is_active"] = True
-            item["created_at"] = datetime.utcnow()
-            item["order_count"] = 0
-            item["image_url"] = ""
-            menu_items.insert_one(item)
-            next_id += 1
-        else:
-            # Update existing items to match MASTER_MENU specs (price/category/active)
-            menu_items.update_one(
-                {"name": item["name"]},
-                {"$set": {
-                    "category": item["category"],
-                    "price": item["price"],
-                    "is_active": True
-                }}
-            )
-
-    # 4. Final Cleanup: Ensure every record has required fields
-    menu_items.update_many({"order_count": {"$exists": False}}, {"$set": {"order_count": 0}})
-    menu_items.update_many({"image_url": {"$exists": False}}, {"$set": {"image_url": ""}})
-    
-    print(f"✅ Menu sync complete. Total items: {menu_items.count_documents({})}")
+    seeded = store.sync_menu(MASTER_MENU)
+    if seeded:
+        bump_catalog_version()
+    print(f"✅ Menu sync complete. Added {seeded} items from the master menu.")
 
 # Run Sync
 sync_menu_items()
@@ -184,13 +107,64 @@ class User(UserMixin):
         self.id = user_data['username']
         self.username = user_data['username']
         self.role = user_data['role']
+        self.outlet_id = user_data.get('outlet_id', DEFAULT_OUTLET_ID)
+
+# Users are cached so authenticated requests (record_sale above all) never
+# wait on the remote database. Every user change bumps a shared users
+# version; a background check every USER_VERSION_CHECK_SECONDS reloads the
+# cached users when it moved (or after USER_CACHE_SECONDS), so a deactivation
+# reaches every worker within that interval. If the database is unreachable
+# the last known user data keeps serving; only a user this worker has never
+# seen waits for it.
+USER_CACHE_SECONDS = float(os.getenv("USER_CACHE_SECONDS", 60))
+USER_VERSION_CHECK_SECONDS = float(os.getenv("USER_VERSION_CHECK_SECONDS", 2))
+user_cache = {}
+users_version = {"value": None, "checked_at": 0.0, "error": None}
+user_refresh_lock = threading.Lock()
+
+def refresh_users():
+    try:
+        # Read the version first so a concurrent change can only look stale
+        version = store.users_version()
+        for username, (loaded_at, _) in list(user_cache.items()):
+            if version != users_version["value"] or time.monotonic() - loaded_at > USER_CACHE_SECONDS:
+                user_cache[username] = (time.monotonic(), store.find_user(username))
+        users_version["value"] = version
+        users_version["error"] = None
+    except Exception as e:
+        if str(e) != users_version["error"]:
+            print("❌ User refresh failed, serving cached users:", e)
+        users_version["error"] = str(e)
+    finally:
+        users_version["checked_at"] = time.monotonic()
+        user_refresh_lock.release()
+
+def refresh_users_in_background():
+    if time.monotonic() - users_version["checked_at"] < USER_VERSION_CHECK_SECONDS:
+        return
+    if not user_refresh_lock.acquire(blocking=False):
+        return
+    threading.Thread(target=refresh_users, name="user-refresh", daemon=True).start()
 
 @login_manager.user_loader
 def load_user(user_id):
-    user_data = users.find_one({"username": user_id})
-    if user_data:
-        return User(user_data)
-    return None
+    refresh_users_in_background()
+    cached = user_cache.get(user_id)
+    if cached:
+        user_data = cached[1]
+    else:
+        try:
+            with db_profiler.phase("auth"):
+                user_data = store.find_user(user_id)
+        except Exception as e:
+            print("❌ User lookup failed:", e)
+            return None
+        user_cache[user_id] = (time.monotonic(), user_data)
+
+    # Deactivated users lose their open sessions too
+    if not user_data or not user_data.get('is_active', True):
+        return None
+    return User(user_data)
 
 def admin_required(f):
     @wraps(f)
@@ -200,13 +174,44 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-# --- Helper Functions ---
+def mongo_required(f):
+    # Rollups, archives, outlets and the analytics on top of them only exist
+    # in MongoDB
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if db is None:
+            return jsonify({"error": f"Not available with the {store.name} storage backend"}), 501
+        return f(*args, **kwargs)
+    return decorated_function
+
+# --- Request Profiling ---
+
+@app.before_request
+def begin_request_profile():
+    db_profiler.begin()
+
+@app.after_request
+def finish_request_profile(response):
+    trace = db_profiler.trace
+    if trace is None:
+        return response
 
-def get_time_slot(hour):
-    if 6 <= hour < 12: return "Morning"
-    if 12 <= hour < 17: return "Afternoon"
-    if 17 <= hour < 22: return "Evening"
-    return "Unknown"
+    if len(trace.commands) > DB_ROUNDTRIP_BUDGET:
+        app.logger.warning(
+            "%s %s made %d Mongo round trips (budget %d): %s",
+            request.method, request.path, len(trace.commands), DB_ROUNDTRIP_BUDGET, "; ".join(trace.describe())
+        )
+
+    requested = request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'
+    if PROFILE_ALL_REQUESTS or (requested and current_user.is_authenticated and current_user.role == 'admin'):
+        response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+@app.teardown_request
+def end_request_profile(exc):
+    db_profiler.end()
+
+# --- Helper Functions ---
 
 def format_doc(doc):
     if not doc:
@@ -214,6 +219,21 @@ def format_doc(doc):
     doc['_id'] = str(doc['_id'])
     return doc
 
+def request_outlet_id():
+    # Staff only ever see their own outlet. Admins default to their own outlet
+    # and may pick another one, or `outlet=all` (None) for a consolidated view.
+    outlet_id = current_user.outlet_id
+    if current_user.role == 'admin':
+        requested = request.args.get('outlet')
+        if requested == 'all':
+            outlet_id = None
+        elif requested:
+            outlet_id = requested
+    return outlet_id
+
+def request_outlet_match():
+    return outlet_match(db, request_outlet_id())
+
 # --- API Endpoints ---
 
 # --- Auth Routes ---
@@ -229,7 +249,7 @@ def login():
         password = data.get('password')
         
         try:
-            user_data = users.find_one({"username": username})
+            user_data = store.find_user(username, with_password=True)
             if user_data and user_data.get('is_active', True) and bcrypt.check_password_hash(user_data['password'], password.encode('utf-8')):
                 user = User(user_data)
                 login_user(user)
@@ -244,7 +264,7 @@ def login():
                 return redirect(url_for('index'))
             
             error_msg = "Invalid username or password"
-            if item := users.find_one({"username": username}):
+            if item := store.find_user(username):
                 if not item.get('is_active', True):
                     error_msg = "Your account has been deactivated. Please contact the administrator."
             
@@ -264,7 +284,7 @@ def login():
 
 @app.route('/health')
 def health():
-    return "OK", 200
+    return jsonify({"status": "ok", "storage": store.name, **store.health()}), 200
 
 @app.route('/logout')
 @login_required
@@ -283,10 +303,7 @@ def user_management():
 @admin_required
 def get_users():
     try:
-        all_users = list(users.find({}, {"password": 0}))
-        for u in all_users:
-            u['_id'] = str(u['_id'])
-        return jsonify(all_users)
+        return jsonify(store.list_users())
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -298,32 +315,33 @@ def create_user():
         username = data.get('username')
         password = data.get('password')
         role = data.get('role') # 'admin' or 'staff'
+        outlet_id = data.get('outlet_id') or current_user.outlet_id
         
         if role not in ['admin', 'staff']:
             return jsonify({"error": "Invalid role"}), 400
+        if not store.outlet_exists(outlet_id):
+            return jsonify({"error": "Unknown outlet"}), 400
             
-        # Constraints
-        admin_count = users.count_documents({"role": "admin"})
-        staff_count = users.count_documents({"role": "staff"})
-        
-        if role == 'admin' and admin_count >= 2:
+        # Constraints (admins are shared, staff limits apply per outlet)
+        if role == 'admin' and store.count_users(role="admin") >= 2:
             return jsonify({"error": "Maximum 2 admin accounts allowed"}), 400
-        if role == 'staff' and staff_count >= 5:
-            return jsonify({"error": "Maximum 5 staff accounts allowed"}), 400
+        if role == 'staff' and store.count_users(outlet_id=outlet_id, role="staff") >= 5:
+            return jsonify({"error": "Maximum 5 staff accounts allowed per outlet"}), 400
             
-        if users.find_one({"username": username}):
+        if store.find_user(username):
             return jsonify({"error": "Username already exists"}), 400
             
         new_user = {
             "username": username,
             "password": bcrypt.generate_password_hash(password).decode('utf-8'),
             "role": role,
+            "outlet_id": outlet_id,
             "created_by": current_user.username,
             "created_at": datetime.now(),
             "is_active": True
         }
         
-        users.insert_one(new_user)
+        store.create_users([new_user])
         return jsonify({"message": f"User {username} created successfully"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -338,18 +356,19 @@ def toggle_user_status():
         if target_username == current_user.username:
             return jsonify({"error": "Cannot deactivate your own account"}), 400
             
-        user_data = users.find_one({"username": target_username})
+        user_data = store.find_user(target_username)
         if not user_data:
             return jsonify({"error": "User not found"}), 404
             
         # Prevent deleting/deactivating the last admin
         if user_data['role'] == 'admin' and user_data['is_active']:
-            admin_count = users.count_documents({"role": "admin", "is_active": True})
+            admin_count = store.count_users(role="admin", is_active=True)
             if admin_count <= 1:
                 return jsonify({"error": "Cannot deactivate the last active admin"}), 400
                 
         new_status = not user_data.get('is_active', True)
-        users.update_one({"username": target_username}, {"$set": {"is_active": new_status}})
+        store.update_user(target_username, {"is_active": new_status})
+        user_cache.pop(target_username, None)
         
         return jsonify({"message": f"User {target_username} status updated", "is_active": new_status})
     except Exception as e:
@@ -366,20 +385,89 @@ def reset_password():
         if not target_username or not new_password:
             return jsonify({"error": "Missing username or password"}), 400
             
-        users.update_one(
-            {"username": target_username},
-            {"$set": {"password": bcrypt.generate_password_hash(new_password).decode('utf-8')}}
-        )
+        store.update_user(target_username, {"password": bcrypt.generate_password_hash(new_password).decode('utf-8')})
         return jsonify({"message": f"Password for {target_username} reset successfully"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# --- Outlet Management (Admin Only) ---
+
+@app.route('/api/admin/outlets', methods=['GET', 'POST'])
+@admin_required
+@mongo_required
+def manage_outlets():
+    try:
+        if request.method == 'GET':
+            return jsonify(list(db.outlets.find().sort("_id", 1)))
+
+        data = request.json
+        outlet_id = (data.get('outlet_id') or '').strip()
+        if not outlet_id:
+            return jsonify({"error": "outlet_id is required"}), 400
+        if db.outlets.find_one({"_id": outlet_id}):
+            return jsonify({"error": "Outlet already exists"}), 400
+
+        db.outlets.insert_one({"_id": outlet_id, "name": data.get('name', outlet_id), "created_at": datetime.now()})
+        return jsonify({"message": f"Outlet {outlet_id} created successfully"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def log_override_price(outlet_id, item_id, old_price, new_price):
+    # Override prices are logged per outlet; None means the menu price applies
+    item = store.get_item(item_id) or {}
+    store.log_price_change({
+        "item_id": item_id,
+        "item_name": item.get('name', ''),
+        "outlet_id": outlet_id,
+        "old_price": old_price,
+        "new_price": new_price,
+        "is_offer": False,
+        "reason": "Outlet override",
+        "changed_by": current_user.username,
+        "changed_at": datetime.now()
+    })
+
+@app.route('/api/admin/outlets/<outlet_id>/menu/<int:item_id>', methods=['PUT', 'DELETE'])
+@admin_required
+@mongo_required
+def outlet_menu_override(outlet_id, item_id):
+    try:
+        if not db.outlets.find_one({"_id": outlet_id}):
+            return jsonify({"error": "Outlet not found"}), 404
+
+        existing = db.menu_overrides.find_one({"outlet_id": outlet_id, "item_id": item_id}) or {}
+        if request.method == 'DELETE':
+            db.menu_overrides.delete_one({"outlet_id": outlet_id, "item_id": item_id})
+            if existing.get("price") is not None:
+                log_override_price(outlet_id, item_id, existing["price"], None)
+            bump_catalog_version()
+            return jsonify({"message": "Override removed"})
+
+        data = request.json
+        override = {}
+        if data.get('price') is not None:
+            override["price"] = float(data['price'])
+        if data.get('is_active') is not None:
+            override["is_active"] = bool(data['is_active'])
+        if not override:
+            return jsonify({"error": "Provide price and/or is_active"}), 400
+
+        override["updated_at"] = datetime.now()
+        db.menu_overrides.update_one({"outlet_id": outlet_id, "item_id": item_id}, {"$set": override}, upsert=True)
+        if "price" in override and override["price"] != existing.get("price"):
+            log_override_price(outlet_id, item_id, existing.get("price"), override["price"])
+        bump_catalog_version()
+        return jsonify({"message": "Override saved"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # --- Default User Bootstrap Logic ---
-if users.count_documents({}) == 0:
+if store.count_users() == 0:
     admin_user = {
         "username": "admin",
         "password": bcrypt.generate_password_hash("admin123").decode('utf-8'),
         "role": "admin",
+        "outlet_id": DEFAULT_OUTLET_ID,
         "created_by": "system",
         "created_at": datetime.now(),
         "is_active": True
@@ -389,12 +477,13 @@ if users.count_documents({}) == 0:
         "username": "staff1",
         "password": bcrypt.generate_password_hash("staff123").decode('utf-8'),
         "role": "staff",
+        "outlet_id": DEFAULT_OUTLET_ID,
         "created_by": "admin",
         "created_at": datetime.now(),
         "is_active": True
     }
     
-    users.insert_many([admin_user, staff_user])
+    store.create_users([admin_user, staff_user])
     print("Default admin and staff accounts created successfully.")
 
 @app.route('/')
@@ -428,7 +517,8 @@ def upload_image():
             
             # Update database
             image_url = f"/static/uploads/{filename}"
-            menu_items.update_one({"item_id": int(item_id)}, {"$set": {"image_url": image_url}})
+            store.update_item(int(item_id), {"image_url": image_url})
+            bump_catalog_version()
             
             return jsonify({"message": "Image uploaded successfully", "image_url": image_url})
             
@@ -459,7 +549,7 @@ def update_price(item_id):
             return jsonify({"error": "Price exceeds maximum limit (10,000)"}), 400
 
         # Find item
-        item = menu_items.find_one({"item_id": int(item_id)})
+        item = store.get_item(int(item_id))
         if not item:
             return jsonify({"error": "Item not found"}), 404
             
@@ -475,14 +565,12 @@ def update_price(item_id):
             update_data["original_price"] = 0
 
         # Update price and offer status
-        menu_items.update_one(
-            {"item_id": int(item_id)},
-            {"$set": update_data}
-        )
+        store.update_item(int(item_id), update_data)
+        
+        bump_catalog_version()
         
         # Log the change
-        price_logs = db.price_logs
-        price_logs.insert_one({
+        store.log_price_change({
             "item_id": int(item_id),
             "item_name": item['name'],
             "old_price": old_price,
@@ -508,25 +596,21 @@ def serve_uploads(filename):
 @login_required
 def get_menu_items():
     try:
-        search_query = request.args.get('search')
-        category = request.args.get('category', 'All')
-        
-        # Only show active items for sales entry
-        query = {"is_active": {"$ne": False}}
-        
-        if category and category != 'All':
-            query["category"] = category
-            
-        if search_query:
-            search_regex = {"$regex": search_query, "$options": "i"}
-            if "category" in query:
-                query["name"] = search_regex
-            else:
-                query["$or"] = [{"name": search_regex}, {"category": search_regex}]
-        
-        # Sort by most sold first (Existing requirement)
-        items = list(menu_items.find(query, {"_id": 0}).sort("order_count", -1))
-        return jsonify(items)
+        # Read the version first so a concurrent edit can only make it look stale
+        version = catalog_version()
+        # Sorted by most sold first, with the outlet's overrides applied
+        items = store.menu_items_for(current_user.outlet_id, request.args.get('category', 'All'), request.args.get('search'))
+        response = jsonify(items)
+        response.headers["X-Catalog-Version"] = str(version)
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/menu-items/version', methods=['GET'])
+@login_required
+def get_catalog_version():
+    try:
+        return jsonify({"version": catalog_version(), "outlet_id": current_user.outlet_id})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -535,7 +619,7 @@ def get_menu_items():
 def admin_get_menu_items():
     try:
         # Admin gets everything, sorted by creation or name
-        items = list(menu_items.find({}, {"_id": 0}).sort("item_id", 1))
+        items = store.all_menu_items()
         return jsonify(items)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -552,12 +636,7 @@ def add_item():
         if not name or not category:
             return jsonify({"error": "Name and Category are required"}), 400
             
-        # Get next ID
-        last_item = menu_items.find_one(sort=[("item_id", -1)])
-        next_id = (last_item["item_id"] + 1) if last_item else 1
-        
         new_item = {
-            "item_id": next_id,
             "name": name,
             "category": category,
             "price": price,
@@ -569,7 +648,8 @@ def add_item():
             "updated_at": datetime.now()
         }
         
-        menu_items.insert_one(new_item)
+        next_id = store.add_item(new_item)
+        bump_catalog_version()
         return jsonify({"message": "Item added successfully", "item_id": next_id})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -580,11 +660,12 @@ def update_item_full(item_id):
     try:
         if request.method == 'DELETE':
             # Soft delete (toggle is_active)
-            item = menu_items.find_one({"item_id": item_id})
+            item = store.get_item(item_id)
             if not item: return jsonify({"error": "Item not found"}), 404
             
             new_status = not item.get("is_active", True)
-            menu_items.update_one({"item_id": item_id}, {"$set": {"is_active": new_status, "updated_at": datetime.now()}})
+            store.update_item(item_id, {"is_active": new_status, "updated_at": datetime.now()})
+            bump_catalog_version()
             return jsonify({"message": f"Item {'disabled' if not new_status else 'enabled'} successfully", "is_active": new_status})
 
         # PUT (Update)
@@ -601,14 +682,153 @@ def update_item_full(item_id):
         if data.get('image_url'):
             update_data["image_url"] = data.get('image_url')
 
-        result = menu_items.update_one({"item_id": item_id}, {"$set": update_data})
-        if result.matched_count == 0:
+        if not store.update_item(item_id, update_data):
             return jsonify({"error": "Item not found"}), 404
-            
+        bump_catalog_version()
+
         return jsonify({"message": "Item updated successfully"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/admin/menu/export', methods=['GET'])
+@admin_required
+def export_menu():
+    try:
+        fmt = request.args.get('format', 'csv')
+        if fmt not in ('csv', 'json'):
+            return jsonify({"error": "format must be csv or json"}), 400
+
+        items = store.all_menu_items(EXPORT_FIELDS)
+        if fmt == 'json':
+            response = jsonify({"version": catalog_version(), "items": items})
+        else:
+            response = app.response_class(to_csv(items), mimetype='text/csv')
+        response.headers["Content-Disposition"] = f"attachment; filename=menu-{datetime.now().strftime('%Y%m%d')}.{fmt}"
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/admin/menu/import', methods=['POST'])
+@admin_required
+def import_menu():
+    try:
+        # Accepts a multipart upload, a JSON body or raw CSV. Nothing is
+        # written unless apply is set, so the same call doubles as the preview.
+        upload = request.files.get('file')
+        if upload:
+            raw = upload.read().decode('utf-8-sig')
+            fmt = 'json' if upload.filename.lower().endswith('.json') else 'csv'
+        elif request.is_json:
+            raw, fmt = request.get_json(), 'json'
+        else:
+            raw, fmt = request.get_data(as_text=True), 'csv'
+        body = raw if isinstance(raw, dict) else {}
+
+        def option(name, default=None):
+            value = body.get(name, request.values.get(name))
+            return default if value is None else value
+
+        def flag(name, default):
+            value = option(name)
+            return default if value is None else str(value).lower() in ('1', 'true', 'yes')
+
+        rows, errors = parse_rows(raw, option('format', fmt))
+        if errors:
+            return jsonify({"error": "Invalid menu file", "details": errors}), 400
+        if not rows:
+            return jsonify({"error": "No items found in the file"}), 400
+
+        version = catalog_version()
+        diff = diff_menu(store.all_menu_items(EXPORT_FIELDS), rows, flag('deactivate_missing', True))
+        summary = {key: len(diff[key]) for key in ("new", "changed", "deactivated")}
+        summary["unchanged"] = diff["unchanged"]
+
+        if not flag('apply', False):
+            return jsonify({"preview": True, "version": version, "summary": summary, "diff": diff})
+
+        expected = option('version')
+        if expected is not None:
+            try:
+                expected = int(expected)
+            except (TypeError, ValueError):
+                return jsonify({"error": "version must be a number"}), 400
+        if expected is not None and expected != version:
+            return jsonify({"error": "The menu changed since this preview; preview the import again"}), 409
+
+        errors = store.apply_menu_diff(diff, current_user.username)
+        if summary["new"] or summary["changed"] or summary["deactivated"]:
+            bump_catalog_version()
+        if errors:
+            return jsonify({"error": "Some rows could not be applied", "details": errors, "summary": summary}), 409
+        return jsonify({"message": "Menu imported successfully", "summary": summary})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/admin/inventory', methods=['GET'])
+@admin_required
+@mongo_required
+def get_inventory():
+    try:
+        outlet_id = request_outlet_id()
+        if not outlet_id:
+            return jsonify({"error": "Stock is tracked per outlet; pick one outlet"}), 400
+        return jsonify(inventory_status(db, outlet_id))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/admin/inventory/count', methods=['POST'])
+@admin_required
+@mongo_required
+def record_stock_count():
+    try:
+        outlet_id = request_outlet_id()
+        if not outlet_id:
+            return jsonify({"error": "Stock is tracked per outlet; pick one outlet"}), 400
+
+        data = request.json or {}
+        counts, errors = parse_counts(data.get('counts'))
+        if errors:
+            return jsonify({"error": "Invalid stock count", "details": errors}), 400
+        if not counts:
+            return jsonify({"error": "No counts given"}), 400
+
+        recorded = record_counts(db, outlet_id, counts, current_user.username)
+        return jsonify({"message": f"Recorded {recorded} stock counts", "outlet_id": outlet_id})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/admin/recipes', methods=['GET'])
+@admin_required
+@mongo_required
+def get_recipes():
+    try:
+        recipes = [{"item_id": r["_id"], "name": r.get("name", ""), "ingredients": r["ingredients"]}
+                   for r in db.recipes.find().sort("_id", 1)]
+        return jsonify(recipes)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/admin/recipes/<int:item_id>', methods=['PUT'])
+@admin_required
+@mongo_required
+def update_recipe(item_id):
+    try:
+        ingredients = (request.json or {}).get('ingredients')
+        if not isinstance(ingredients, dict):
+            return jsonify({"error": "ingredients must map ingredient names to quantities"}), 400
+
+        item = store.get_item(item_id)
+        if not item:
+            return jsonify({"error": "Item not found"}), 404
+
+        try:
+            recipe = set_recipe(db, item, ingredients)
+        except (TypeError, ValueError):
+            return jsonify({"error": "Ingredient quantities must be numbers"}), 400
+        return jsonify({"message": "Recipe saved" if recipe else "Recipe removed", "ingredients": recipe})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/record-sale', methods=['POST'])
 @login_required
 def record_sale():
@@ -620,29 +840,17 @@ def record_sale():
         if payment_method not in ['Cash', 'PhonePe', 'UPI']:
             return jsonify({"error": "Invalid payment method"}), 400
 
-        item = menu_items.find_one({"item_id": int(item_id)})
+        item = store.lookup_item(int(item_id), current_user.outlet_id)
         if not item:
             return jsonify({"error": "Item not found"}), 404
+        # Disabled globally or by this outlet's override
+        if not item.get("is_active", True):
+            return jsonify({"error": "Item is not available"}), 400
         
-        now = datetime.now()
-        sale = {
-            "item_id": item_id,
-            "name": item['name'],
-            "category": item['category'],
-            "price": item['price'],
-            "payment_method": payment_method,
-            "timestamp": now,
-            "date": now.strftime("%Y-%m-%d"),
-            "month": now.strftime("%m"),
-            "year": now.strftime("%Y"),
-            "time_slot": get_time_slot(now.hour),
-            "sold_by": current_user.username
-        }
-        
-        sales.insert_one(sale)
-        menu_items.update_one({"item_id": int(item_id)}, {"$inc": {"order_count": 1}})
+        sale = build_sale(item, payment_method, current_user.username, current_user.outlet_id, datetime.now())
+        sale_id = store.record_sale(sale)
         
-        return jsonify({"message": "Sale recorded successfully"})
+        return jsonify({"message": "Sale recorded successfully", "sale_id": sale_id})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -654,24 +862,12 @@ def staff_performance():
         month_filter = request.args.get('month')
         year_filter = request.args.get('year')
         
-        match_query = {}
-        if date_filter: match_query["date"] = date_filter
-        if month_filter: match_query["month"] = month_filter
-        if year_filter: match_query["year"] = year_filter
-            
-        pipeline = []
-        if match_query: pipeline.append({"$match": match_query})
-            
-        pipeline.extend([
-            {"$group": {
-                "_id": "$sold_by",
-                "total_sales": {"$sum": 1},
-                "total_revenue": {"$sum": "$price"}
-            }},
-            {"$sort": {"total_revenue": -1}}
-        ])
-        
-        performance = list(sales.aggregate(pipeline))
+        performance = [
+            {"_id": row["_id"], "total_sales": row["count"], "total_revenue": row["revenue"]}
+            for row in store.sales_grouped_by(request_outlet_id(), "sold_by",
+                                              date=date_filter, month=month_filter, year=year_filter)
+        ]
+        performance.sort(key=lambda row: row["total_revenue"], reverse=True)
         return jsonify(performance)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -681,19 +877,7 @@ def staff_performance():
 def daily_dashboard():
     try:
         target_date = request.args.get('date', datetime.now().strftime("%Y-%m-%d"))
-        pipeline = [
-            {"$match": {"date": target_date}},
-            {"$group": {
-                "_id": None,
-                "total_revenue": {"$sum": "$price"},
-                "order_count": {"$sum": 1},
-                "cash_amount": {"$sum": {"$cond": [{"$eq": ["$payment_method", "Cash"]}, "$price", 0]}},
-                "phonepe_amount": {"$sum": {"$cond": [{"$eq": ["$payment_method", "PhonePe"]}, "$price", 0]}},
-                "upi_amount": {"$sum": {"$cond": [{"$eq": ["$payment_method", "UPI"]}, "$price", 0]}}
-            }}
-        ]
-        stats = list(sales.aggregate(pipeline))
-        summary = stats[0] if stats else {"total_revenue": 0, "order_count": 0, "cash_amount": 0, "phonepe_amount": 0, "upi_amount": 0}
+        summary = store.sales_summary(request_outlet_id(), date=target_date)
         return jsonify(summary)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -705,19 +889,7 @@ def monthly_dashboard():
         now = datetime.now()
         month = request.args.get('month', now.strftime("%m"))
         year = request.args.get('year', now.strftime("%Y"))
-        pipeline = [
-            {"$match": {"month": month, "year": year}},
-            {"$group": {
-                "_id": None,
-                "total_revenue": {"$sum": "$price"},
-                "order_count": {"$sum": 1},
-                "cash_amount": {"$sum": {"$cond": [{"$eq": ["$payment_method", "Cash"]}, "$price", 0]}},
-                "phonepe_amount": {"$sum": {"$cond": [{"$eq": ["$payment_method", "PhonePe"]}, "$price", 0]}},
-                "upi_amount": {"$sum": {"$cond": [{"$eq": ["$payment_method", "UPI"]}, "$price", 0]}}
-            }}
-        ]
-        stats = list(sales.aggregate(pipeline))
-        summary = stats[0] if stats else {"total_revenue": 0, "order_count": 0, "cash_amount": 0, "phonepe_amount": 0, "upi_amount": 0}
+        summary = store.sales_summary(request_outlet_id(), month=month, year=year)
         return jsonify(summary)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -727,19 +899,7 @@ def monthly_dashboard():
 def yearly_dashboard():
     try:
         year = request.args.get('year', datetime.now().strftime("%Y"))
-        pipeline = [
-            {"$match": {"year": year}},
-            {"$group": {
-                "_id": None,
-                "total_revenue": {"$sum": "$price"},
-                "order_count": {"$sum": 1},
-                "cash_amount": {"$sum": {"$cond": [{"$eq": ["$payment_method", "Cash"]}, "$price", 0]}},
-                "phonepe_amount": {"$sum": {"$cond": [{"$eq": ["$payment_method", "PhonePe"]}, "$price", 0]}},
-                "upi_amount": {"$sum": {"$cond": [{"$eq": ["$payment_method", "UPI"]}, "$price", 0]}}
-            }}
-        ]
-        overall = list(sales.aggregate(pipeline))
-        summary = overall[0] if overall else {"total_revenue": 0, "order_count": 0, "cash_amount": 0, "phonepe_amount": 0, "upi_amount": 0}
+        summary = store.sales_summary(request_outlet_id(), year=year)
         return jsonify(summary)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -748,12 +908,126 @@ def yearly_dashboard():
 @admin_required
 def time_intelligence():
     try:
-        pipeline = [{"$group": {"_id": "$time_slot", "revenue": {"$sum": "$price"}, "count": {"$sum": 1}}}]
-        data = list(sales.aggregate(pipeline))
+        data = store.sales_grouped_by(request_outlet_id(), "time_slot")
         return jsonify(data)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/sales/series', methods=['GET'])
+@admin_required
+@mongo_required
+def sales_time_series():
+    try:
+        today = date.today()
+        try:
+            end = datetime.strptime(request.args.get('to', today.strftime("%Y-%m-%d")), "%Y-%m-%d")
+            start = datetime.strptime(request.args.get('from', (end - timedelta(days=29)).strftime("%Y-%m-%d")), "%Y-%m-%d")
+        except ValueError:
+            return jsonify({"error": "from/to must be YYYY-MM-DD"}), 400
+
+        granularity = request.args.get('granularity', 'day')
+        group_by = request.args.get('group_by')
+        if granularity not in GRANULARITIES:
+            return jsonify({"error": f"granularity must be one of {', '.join(GRANULARITIES)}"}), 400
+        if group_by and group_by not in GROUP_FIELDS:
+            return jsonify({"error": f"group_by must be one of {', '.join(GROUP_FIELDS)}"}), 400
+        if start > end:
+            return jsonify({"error": "from must not be after to"}), 400
+        if (end - start).days > 3 * 366:
+            return jsonify({"error": "Range too large (max 3 years)"}), 400
+
+        result = sales_series(db, request_outlet_match(), start, end, granularity, group_by)
+        return jsonify({
+            "from": start.strftime("%Y-%m-%d"),
+            "to": end.strftime("%Y-%m-%d"),
+            "granularity": granularity,
+            "group_by": group_by,
+            **result
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/forecast', methods=['GET'])
+@login_required
+@mongo_required
+def demand_forecast():
+    try:
+        target = request.args.get('date', (date.today() + timedelta(days=1)).strftime("%Y-%m-%d"))
+        outlet_id = request_outlet_id()
+        match = outlet_match(db, outlet_id)
+        # Consolidated forecasts are cached per outlet set, so adding an outlet starts a new entry
+        cache_key = outlet_id or "all:" + ",".join(sorted(match["outlet_id"]["$in"]))
+        items = forecast_demand(db, match, target, cache_key)
+        return jsonify({"date": target, "outlet_id": outlet_id or "all", "items": items})
+    except ValueError:
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/admin/prices/as-of', methods=['GET'])
+@admin_required
+@mongo_required
+def get_prices_as_of():
+    try:
+        # A bare date means "at the end of that day"
+        value = request.args.get('at', date.today().strftime("%Y-%m-%d"))
+        try:
+            if len(value) == 10:
+                when = datetime.strptime(value, "%Y-%m-%d") + timedelta(days=1)
+            else:
+                when = datetime.strptime(value, "%Y-%m-%d %H:%M")
+            item_ids = [int(i) for i in request.args.get('item_ids', '').split(',') if i.strip()]
+        except ValueError:
+            return jsonify({"error": "at must be YYYY-MM-DD or YYYY-MM-DD HH:MM and item_ids a list of numbers"}), 400
+
+        outlet_id = request_outlet_id()
+        return jsonify({"at": value, "outlet_id": outlet_id or "all",
+                        "items": prices_as_of(db, when, item_ids or None, outlet_id)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/admin/prices/<int:item_id>/history', methods=['GET'])
+@admin_required
+@mongo_required
+def get_price_history(item_id):
+    try:
+        try:
+            start = datetime.strptime(request.args['from'], "%Y-%m-%d") if request.args.get('from') else None
+            end = datetime.strptime(request.args['to'], "%Y-%m-%d") + timedelta(days=1) if request.args.get('to') else None
+        except ValueError:
+            return jsonify({"error": "from/to must be YYYY-MM-DD"}), 400
+        outlet_id = request_outlet_id()
+        return jsonify({"item_id": item_id, "outlet_id": outlet_id or "all",
+                        "changes": price_timeline(db, item_id, start, end, outlet_id)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/admin/prices/offer-impact', methods=['GET'])
+@admin_required
+@mongo_required
+def get_offer_impact():
+    try:
+        today = date.today()
+        try:
+            end = datetime.strptime(request.args.get('to', today.strftime("%Y-%m-%d")), "%Y-%m-%d")
+            start = datetime.strptime(request.args.get('from', (end - timedelta(days=30)).strftime("%Y-%m-%d")), "%Y-%m-%d")
+            window = int(request.args.get('window', 7))
+        except ValueError:
+            return jsonify({"error": "from/to must be YYYY-MM-DD and window a number of days"}), 400
+        if not 1 <= window <= 60:
+            return jsonify({"error": "window must be between 1 and 60 days"}), 400
+
+        offers_only = request.args.get('offers_only', 'false').lower() == 'true'
+        changes = offer_impact(db, request_outlet_match(), start, end + timedelta(days=1), window, offers_only)
+        return jsonify({
+            "from": start.strftime("%Y-%m-%d"),
+            "to": end.strftime("%Y-%m-%d"),
+            "window_days": window,
+            "changes": changes
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     app.run(host='0.0.0.0', port=port)
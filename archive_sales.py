@@ -0,0 +1,81 @@
+import os
+import argparse
+from datetime import date, timedelta
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+from dotenv import load_dotenv
+
+from rollups import day_start, ensure_daily_rollups
+from outlets import outlet_ids
+
+load_dotenv()
+
+RETENTION_DAYS = int(os.getenv("SALES_RETENTION_DAYS", 90))
+BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 5000))
+ARCHIVE_PREFIX = "sales_archive_"
+STATE_ID = "sales"
+
+
+def archive_collection_name(timestamp):
+    return f"{ARCHIVE_PREFIX}{timestamp.strftime('%Y_%m')}"
+
+
+def archived_before(db):
+    state = db.archive_state.find_one({"_id": STATE_ID})
+    return state["archived_before"] if state else None
+
+
+def _copy_batch(db, batch):
+    by_month = {}
+    for doc in batch:
+        by_month.setdefault(archive_collection_name(doc["timestamp"]), []).append(doc)
+
+    for name, docs in by_month.items():
+        try:
+            db[name].insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # A previous run may have copied part of this batch before stopping;
+            # those documents keep their _id, so duplicates are safe to skip.
+            other = [err for err in e.details.get("writeErrors", []) if err.get("code") != 11000]
+            if other:
+                raise
+
+
+def archive_sales(db, retention_days=RETENTION_DAYS, batch_size=BATCH_SIZE, dry_run=False):
+    cutoff = day_start(date.today() - timedelta(days=retention_days))
+    cutoff_str = cutoff.strftime("%Y-%m-%d")
+    query = {"outlet_id": {"$in": outlet_ids(db)}, "timestamp": {"$lt": cutoff}}
+
+    if dry_run:
+        pending = db.sales.count_documents(query)
+        print(f"ℹ️ {pending} sales older than {cutoff_str} would be archived.")
+        return pending
+
+    # Rollups must cover every archived day before the dashboards stop seeing
+    # those sales in the hot collection.
+    ensure_daily_rollups(db, cutoff)
+    db.archive_state.update_one({"_id": STATE_ID}, {"$max": {"archived_before": cutoff_str}}, upsert=True)
+
+    moved = 0
+    while True:
+        batch = list(db.sales.find(query).sort("timestamp", 1).limit(batch_size))
+        if not batch:
+            break
+        _copy_batch(db, batch)
+        db.sales.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}})
+        moved += len(batch)
+        print(f"📦 Archived {moved} sales so far...")
+
+    print(f"✅ Archive complete. Moved {moved} sales older than {cutoff_str}.")
+    return moved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old sales into monthly archive collections.")
+    parser.add_argument("--retention-days", type=int, default=RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv("MONGO_URI"))
+    archive_sales(client.get_database(), args.retention_days, args.batch_size, args.dry_run)
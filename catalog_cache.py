@@ -0,0 +1,100 @@
+"""In-process snapshot of the menu and per-outlet overrides.
+
+record_sale resolves items from this snapshot instead of asking MongoDB, so
+taking an order does not wait on the remote database. The snapshot is tied
+to the shared catalog version (bumped on every menu, price or override
+change): a background check every CATALOG_VERSION_CHECK_SECONDS refreshes it
+when another worker changed the menu, while the old one keeps serving. Only
+a cold start, or an unknown item_id after a version change, waits for
+MongoDB.
+"""
+import os
+import time
+import threading
+from pymongo.errors import PyMongoError
+
+CATALOG_CACHE_SECONDS = float(os.getenv("CATALOG_CACHE_SECONDS", 30))
+CATALOG_VERSION_CHECK_SECONDS = float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", 2))
+# Unknown item_ids re-check the version at most this often
+MISS_CHECK_SECONDS = 1.0
+
+
+def apply_override(item, override):
+    if override:
+        if "price" in override:
+            item["price"] = override["price"]
+        if "is_active" in override:
+            item["is_active"] = item.get("is_active", True) and override["is_active"]
+    return item
+
+
+class CatalogCache:
+    def __init__(self, menu_items, menu_overrides, catalog_meta, ttl=CATALOG_CACHE_SECONDS,
+                 check_interval=CATALOG_VERSION_CHECK_SECONDS):
+        self.menu_items = menu_items
+        self.menu_overrides = menu_overrides
+        self.catalog_meta = catalog_meta
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._items = None
+        self._overrides = {}
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._miss_checked_at = 0.0
+        self._refreshing = threading.Lock()
+
+    def shared_version(self):
+        meta = self.catalog_meta.find_one({"_id": "menu"}, {"version": 1})
+        return meta["version"] if meta else 0
+
+    def refresh(self):
+        # Read the version first so a concurrent edit can only make it look stale
+        version = self.shared_version()
+        items = {item["item_id"]: item for item in self.menu_items.find({}, {"_id": 0})}
+        overrides = {(o["outlet_id"], o["item_id"]): o for o in self.menu_overrides.find({}, {"_id": 0})}
+        now = time.monotonic()
+        self._items, self._overrides, self._version = items, overrides, version
+        self._loaded_at = self._checked_at = now
+
+    def _check(self):
+        self._checked_at = time.monotonic()
+        if time.monotonic() - self._loaded_at > self.ttl or self.shared_version() != self._version:
+            self.refresh()
+
+    def _check_in_background(self):
+        if not self._refreshing.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self._check()
+            except PyMongoError as e:
+                print("❌ Catalog refresh failed, serving cached menu:", e)
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name="catalog-refresh", daemon=True).start()
+
+    def invalidate(self):
+        self._loaded_at = self._checked_at = 0.0
+        self._version = None
+
+    def get(self, item_id, outlet_id):
+        now = time.monotonic()
+        if self._items is None:
+            self.refresh()
+        elif now - self._checked_at > self.check_interval or now - self._loaded_at > self.ttl:
+            self._check_in_background()
+
+        item = self._items.get(item_id)
+        if item is None and now - self._miss_checked_at > MISS_CHECK_SECONDS:
+            # New items bump the shared version; anything else is simply
+            # unknown, and at most one check a second goes to MongoDB.
+            self._miss_checked_at = now
+            if self.shared_version() != self._version:
+                self.refresh()
+                item = self._items.get(item_id)
+        if item is None:
+            return None
+        return apply_override(dict(item), self._overrides.get((outlet_id, item_id)))
@@ -0,0 +1,218 @@
+"""Query-plan regression checks.
+
+Starts a throwaway mongod (or uses --uri), seeds it with a realistic sales
+volume, then explains the exact queries and pipelines the routes in app.py
+issue. Fails (exit code 1) when a route stops using an index or examines far
+more documents than it returns, so CI catches a COLLSCAN before production.
+
+    python check_query_plans.py                 # needs mongod on PATH
+    python check_query_plans.py --uri mongodb://localhost:27017/plan_check
+"""
+import os
+import sys
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, date, timedelta
+from pymongo import MongoClient
+
+from rollups import ROLLUP_COLLECTION, ensure_daily_rollups
+from outlets import DEFAULT_OUTLET_ID, outlet_match
+from mongo_storage import menu_items_query, summary_pipelines, grouped_pipelines
+from generate_sales import generate_sales
+from sales_series import series_pipeline
+from inventory import sold_pipeline
+from price_history import as_of_pipeline, next_change_pipeline, daily_units_pipeline
+
+INDEX_STAGES = {"IXSCAN", "EXPRESS_IXSCAN", "IDHACK", "EXPRESS_IDHACK", "DISTINCT_SCAN", "COUNT_SCAN"}
+
+
+def start_mongod():
+    if not shutil.which("mongod"):
+        sys.exit("❌ mongod not found on PATH (or pass --uri)")
+    dbpath = tempfile.mkdtemp(prefix="plan_check_")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    proc = subprocess.Popen(
+        ["mongod", "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    uri = f"mongodb://127.0.0.1:{port}/plan_check"
+    client = MongoClient(uri, serverSelectionTimeoutMS=500)
+    for _ in range(60):
+        try:
+            client.admin.command("ping")
+            return proc, dbpath, uri
+        except Exception:
+            time.sleep(0.5)
+    proc.terminate()
+    sys.exit("❌ mongod did not start")
+
+
+def explain(db, command):
+    return db.command("explain", command, verbosity="executionStats")
+
+
+def walk(node, found):
+    # Collects plan stages, documents examined, and the documents that made it
+    # out of the fetch/index stages (the output of later $group stages would
+    # make every aggregation look wasteful).
+    if isinstance(node, dict):
+        stage = node.get("stage")
+        if isinstance(stage, str):
+            found["stages"].add(stage)
+            if "nReturned" in node and (stage == "FETCH" or stage in INDEX_STAGES):
+                found["returned"].setdefault(stage, 0)
+                found["returned"][stage] += node["nReturned"]
+        if "totalDocsExamined" in node:
+            found["examined"] += node["totalDocsExamined"]
+        if node.get("collectionScans"):
+            # $lookup sub-pipelines report their scans this way
+            found["stages"].add("COLLSCAN")
+        for key, value in node.items():
+            if key != "rejectedPlans":
+                walk(value, found)
+    elif isinstance(node, list):
+        for value in node:
+            walk(value, found)
+    return found
+
+
+def check(name, plan, max_ratio):
+    found = walk(plan, {"stages": set(), "examined": 0, "returned": {}})
+    returned = found["returned"].get("FETCH", max(found["returned"].values(), default=0))
+    ratio = found["examined"] / max(returned, 1)
+    problems = []
+    if "COLLSCAN" in found["stages"]:
+        problems.append("COLLSCAN")
+    if not found["stages"] & INDEX_STAGES:
+        problems.append("no index scan")
+    if max_ratio is not None and ratio > max_ratio:
+        problems.append(f"examined/returned {ratio:.2f} > {max_ratio}")
+
+    status = "❌" if problems else "✅"
+    print(f"{status} {name:<40} examined={found['examined']:<7} returned={returned:<7} {', '.join(problems)}")
+    return not problems
+
+
+def run_checks(app):
+    db = app.db
+    outlet = DEFAULT_OUTLET_ID
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    month, year = now.strftime("%m"), now.strftime("%Y")
+    one_outlet = outlet_match(db, outlet)
+    all_outlets = outlet_match(db, None)
+
+    checks = [
+        ("get_menu_items", {"find": "menu_items", "filter": menu_items_query(), "sort": {"order_count": -1}}, 1.5),
+        ("get_menu_items (category)", {"find": "menu_items", "filter": menu_items_query("Snacks"), "sort": {"order_count": -1}}, 1.5),
+        ("get_menu_items (search)", {"find": "menu_items", "filter": menu_items_query("All", "oreo"), "sort": {"order_count": -1}}, None),
+        ("get_menu_items overrides", {"find": "menu_overrides", "filter": {"outlet_id": outlet}}, 1.5),
+        ("load_user", {"find": "users", "filter": {"username": "admin"}}, 1.5),
+    ]
+
+    dashboards = [
+        ("daily_dashboard", summary_pipelines(db, {**one_outlet, "date": today})),
+        ("monthly_dashboard", summary_pipelines(db, {**one_outlet, "month": month, "year": year})),
+        ("yearly_dashboard", summary_pipelines(db, {**one_outlet, "year": year})),
+        ("yearly_dashboard (all outlets)", summary_pipelines(db, {**all_outlets, "year": year})),
+        ("staff_performance", grouped_pipelines(db, {**one_outlet, "month": month, "year": year}, "sold_by")),
+        ("time_intelligence", grouped_pipelines(db, one_outlet, "time_slot")),
+    ]
+    for name, (hot, cold) in dashboards:
+        checks.append((f"{name} [sales]", {"aggregate": "sales", "pipeline": hot, "cursor": {}}, 1.5))
+        if cold:
+            checks.append((f"{name} [rollups]", {"aggregate": ROLLUP_COLLECTION, "pipeline": cold, "cursor": {}}, 1.5))
+
+    month_ago = now - timedelta(days=30)
+    series_closed = {**one_outlet, "date": {"$gte": month_ago.strftime("%Y-%m-%d"), "$lt": today}}
+    series_open = {**one_outlet, "timestamp": {"$gte": now.replace(hour=0, minute=0, second=0, microsecond=0)}}
+    checks += [
+        ("sales_time_series [rollups]", {"aggregate": ROLLUP_COLLECTION, "pipeline": series_pipeline(
+            series_closed, "day", "week", "category", "$revenue", "$count"), "cursor": {}}, 1.5),
+        ("sales_time_series [sales]", {"aggregate": "sales", "pipeline": series_pipeline(
+            series_open, "timestamp", "day", "payment_method", "$price", 1), "cursor": {}}, 1.5),
+    ]
+
+    # inventory_status: closed days from rollups, open days from raw sales
+    checks += [
+        ("inventory_status [rollups]", {"aggregate": ROLLUP_COLLECTION, "pipeline": sold_pipeline(
+            {**one_outlet, "date": {"$gte": month_ago.strftime("%Y-%m-%d"), "$lt": today}}, "$count"), "cursor": {}}, 1.5),
+        ("inventory_status [sales]", {"aggregate": "sales", "pipeline": sold_pipeline(
+            series_open, 1), "cursor": {}}, 1.5),
+        ("inventory_status [stock_counts]", {"aggregate": "stock_counts", "pipeline": [
+            {"$match": one_outlet}, {"$sort": {"ingredient": 1, "counted_at": -1}},
+            {"$group": {"_id": "$ingredient", "count": {"$first": "$$ROOT"}}}], "cursor": {}}, 1.5),
+    ]
+
+    # Price history: as-of lookups and the offer-impact rollup read
+    db.price_logs.insert_many([
+        {"item_id": i, "item_name": f"Item {i}", "old_price": 100, "new_price": 90 + d, "is_offer": d % 2 == 0,
+         "changed_at": now - timedelta(days=d)}
+        for i in range(1, 60) for d in range(0, 60, 10)
+    ] + [
+        {"item_id": i, "item_name": f"Item {i}", "outlet_id": "second", "old_price": None, "new_price": 80,
+         "is_offer": False, "changed_at": now - timedelta(days=d)}
+        for i in range(1, 60, 5) for d in range(0, 60, 20)
+    ])
+    checks += [
+        ("prices_as_of", {"aggregate": "price_logs", "pipeline": as_of_pipeline(
+            [1, 2, 3], now - timedelta(days=25)), "cursor": {}}, 1.5),
+        ("prices_as_of [next change]", {"aggregate": "price_logs", "pipeline": next_change_pipeline(
+            [1, 2, 3], now - timedelta(days=25)), "cursor": {}}, 1.5),
+        ("prices_as_of [outlet]", {"aggregate": "price_logs", "pipeline": as_of_pipeline(
+            [1, 6, 11], now - timedelta(days=25), "second"), "cursor": {}}, 1.5),
+        ("price_timeline", {"find": "price_logs", "filter": {"item_id": 6, "outlet_id": {"$in": [None, "second"]}},
+                            "sort": {"changed_at": 1}}, 1.5),
+        ("offer_impact [rollups]", {"aggregate": ROLLUP_COLLECTION, "pipeline": daily_units_pipeline({
+            **one_outlet, "item_id": {"$in": [1, 2, 3]}, "date": {"$gte": month_ago.strftime("%Y-%m-%d"), "$lt": today}
+        }), "cursor": {}}, 1.5),
+    ]
+
+    return all([check(name, explain(db, command), ratio) for name, command, ratio in checks])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assert index usage for the queries issued by app.py.")
+    parser.add_argument("--uri", help="Use this (disposable!) database instead of starting mongod")
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--per-day", type=int, default=300, help="Sales per outlet per day")
+    args = parser.parse_args()
+
+    proc = dbpath = None
+    uri = args.uri
+    if not uri:
+        proc, dbpath, uri = start_mongod()
+
+    try:
+        os.environ["MONGO_URI"] = uri
+        os.environ["STORAGE_BACKEND"] = "mongo"
+        seed_db = MongoClient(uri).get_database()
+        seed_db.sales.drop()
+        seed_db.outlets.update_one({"_id": "second"}, {"$setOnInsert": {"name": "Second"}}, upsert=True)
+
+        import app  # creates indexes, syncs the menu and bootstraps users
+
+        generate_sales(app.db, uri, date.today() - timedelta(days=args.days), args.days + 1, args.per_day)
+        ensure_daily_rollups(app.db)
+        # Exercise the split between hot sales and rollups
+        boundary = (datetime.now() - timedelta(days=args.days // 2)).strftime("%Y-%m-%d")
+        app.db.archive_state.update_one({"_id": "sales"}, {"$set": {"archived_before": boundary}}, upsert=True)
+
+        ok = run_checks(app)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+            shutil.rmtree(dbpath, ignore_errors=True)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
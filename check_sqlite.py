@@ -0,0 +1,201 @@
+"""Smoke test and benchmark on the embedded SQLite backend.
+
+Needs no MongoDB or any other service: the app is imported with
+STORAGE_BACKEND=sqlite against a throwaway database file and driven through
+Flask's test client. Checks the sale, menu, user and dashboard paths, that
+the dashboard and menu queries use an index (EXPLAIN QUERY PLAN), then times
+record-sale and the dashboards over a synthetic history. Exits 1 on any
+failure, so CI can run it next to check_query_plans.py.
+
+    python check_sqlite.py
+    python check_sqlite.py --days 365 --per-day 400 --sales 2000
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import date, datetime, timedelta
+
+from generate_sales import generate_sales_sqlite
+
+failures = []
+
+
+def check(name, ok, detail=""):
+    if ok:
+        print(f"✅ {name}")
+    else:
+        failures.append(name)
+        print(f"❌ {name} {detail}")
+    return ok
+
+
+def expect(name, response, status=200):
+    return check(name, response.status_code == status, f"(HTTP {response.status_code}: {response.get_data(as_text=True)[:200]})")
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def login(client, username, password):
+    return client.post('/login', json={"username": username, "password": password})
+
+
+def smoke(app):
+    client = app.app.test_client()
+    today = date.today().strftime("%Y-%m-%d")
+
+    expect("health", client.get('/health'))
+    check("health reports sqlite", client.get('/health').json.get("storage") == "sqlite")
+    expect("admin login", login(client, "admin", "admin123"))
+    expect("wrong password rejected", login(app.app.test_client(), "admin", "nope"), 401)
+
+    # Menu
+    menu = client.get('/api/menu-items')
+    expect("menu items", menu)
+    items = menu.json if isinstance(menu.json, list) else menu.json.get("items", [])
+    check("menu seeded", len(items) > 0)
+    item = items[0]
+    expect("menu search", client.get('/api/menu-items?search=' + item["name"][:3]))
+    expect("catalog version", client.get('/api/menu-items/version'))
+    added = client.post('/api/admin/item', json={"name": "Smoke Test Toast", "category": "Snacks", "price": 40})
+    expect("add item", added)
+    expect("update price", client.put(f'/api/admin/update-price/{item["item_id"]}', json={"price": item["price"] + 5, "reason": "smoke"}))
+    check("price updated", app.store.get_item(item["item_id"])["price"] == item["price"] + 5)
+    expect("menu export", client.get('/api/admin/menu/export?format=csv'))
+    preview = client.post('/api/admin/menu/import', json={"items": [
+        {"name": "Smoke Test Toast", "category": "Snacks", "price": 45},
+        {"name": "Smoke Test Bun", "category": "Snacks", "price": 30}
+    ], "deactivate_missing": False})
+    expect("import preview", preview)
+    check("import preview diff", preview.json.get("summary", {}).get("new") == 1 and preview.json["summary"].get("changed") == 1,
+          str(preview.json.get("summary")))
+    expect("import apply", client.post('/api/admin/menu/import', json={
+        "items": [{"name": "Smoke Test Bun", "category": "Snacks", "price": 30}],
+        "deactivate_missing": False, "apply": True, "version": preview.json.get("version")
+    }))
+    expect("import rejects bad version", client.post('/api/admin/menu/import', json={
+        "items": [{"name": "Smoke Test Bun", "category": "Snacks", "price": 30}], "apply": True, "version": "x"
+    }), 400)
+
+    # Sales and dashboards
+    before = app.store.sales_summary(app.DEFAULT_OUTLET_ID, date=today)
+    for method in ("Cash", "UPI", "PhonePe"):
+        expect(f"record sale ({method})", client.post('/api/record-sale', json={"item_id": item["item_id"], "payment_method": method}))
+    expect("unknown item rejected", client.post('/api/record-sale', json={"item_id": 999999}), 404)
+    expect("disable item", client.delete(f'/api/admin/item/{item["item_id"]}'))
+    expect("disabled item rejected", client.post('/api/record-sale', json={"item_id": item["item_id"]}), 400)
+    expect("enable item", client.delete(f'/api/admin/item/{item["item_id"]}'))
+    daily = client.get('/api/daily-dashboard')
+    expect("daily dashboard", daily)
+    check("daily dashboard counts the sales", daily.json.get("order_count") == before["order_count"] + 3,
+          f"({daily.json.get('order_count')} != {before['order_count'] + 3})")
+    expect("monthly dashboard", client.get('/api/monthly-dashboard'))
+    expect("yearly dashboard", client.get('/api/yearly-dashboard'))
+    expect("time intelligence", client.get('/api/time-intelligence'))
+    expect("staff performance", client.get('/api/admin/staff-performance?date=' + today))
+
+    # Users
+    expect("create user", client.post('/api/admin/create-user', json={"username": "smoke_staff", "password": "pw12345", "role": "staff"}))
+    expect("list users", client.get('/api/admin/users'))
+    staff = app.app.test_client()
+    expect("new user login", login(staff, "smoke_staff", "pw12345"))
+    expect("staff records a sale", staff.post('/api/record-sale', json={"item_id": item["item_id"]}))
+    expect("staff kept out of admin routes", staff.get('/api/admin/users'), 403)
+    expect("deactivate user", client.post('/api/admin/toggle-user-status', json={"username": "smoke_staff"}))
+    check("open session ends on deactivation",
+          staff.post('/api/record-sale', json={"item_id": item["item_id"]}).status_code != 200)
+    # A deactivation made through another worker arrives via the shared users version
+    other = app.app.test_client()
+    expect("second staff login", login(other, "staff1", "staff123"))
+    app.store.update_user("staff1", {"is_active": False})
+    check("open session ends on deactivation elsewhere", wait_until(
+        lambda: other.post('/api/record-sale', json={"item_id": item["item_id"]}).status_code != 200))
+    app.store.update_user("staff1", {"is_active": True})
+    expect("deactivated user cannot log in", login(app.app.test_client(), "smoke_staff", "pw12345"), 401)
+    expect("reset password", client.post('/api/admin/reset-password', json={"username": "staff1", "password": "new12345"}))
+
+    # MongoDB-only analytics answer 501
+    expect("forecast needs MongoDB", client.get('/api/forecast'), 501)
+
+
+def query_plans(store):
+    # Every dashboard and menu query must be answered from an index
+    today = date.today()
+    where_date, params_date = store._sales_where("main", {"date": today.strftime("%Y-%m-%d")})
+    where_month, params_month = store._sales_where("main", {"month": today.strftime("%m"), "year": today.strftime("%Y")})
+    queries = [
+        ("daily summary", f"SELECT COUNT(*) FROM sales{where_date}", params_date),
+        ("monthly summary", f"SELECT COUNT(*) FROM sales{where_month}", params_month),
+        ("staff performance", f"SELECT sold_by, COUNT(*) FROM sales{where_date} GROUP BY sold_by", params_date),
+        ("item lookup", "SELECT * FROM menu_items WHERE item_id = ?", (1,)),
+        ("user lookup", "SELECT * FROM users WHERE username = ?", ("admin",)),
+        ("menu by category", "SELECT * FROM menu_items WHERE is_active = 1 AND category = ? ORDER BY order_count DESC", ("Snacks",)),
+    ]
+    conn = store._conn()
+    for name, sql, params in queries:
+        plan = " | ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        check(f"plan: {name}", "USING" in plan and "SCAN sales" not in plan, f"({plan})")
+
+
+def benchmark(app, sales):
+    client = app.app.test_client()
+    login(client, "admin", "admin123")
+    item_ids = [item["item_id"] for item in app.store.all_menu_items(["item_id", "is_active"]) if item["is_active"]]
+
+    timings = []
+    for i in range(sales):
+        started = time.perf_counter()
+        client.post('/api/record-sale', json={"item_id": item_ids[i % len(item_ids)], "payment_method": "UPI"})
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"ℹ️ record-sale: {sales} sales, p50 {timings[len(timings) // 2] * 1000:.2f} ms, "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1000:.2f} ms, {sales / sum(timings):.0f}/s")
+
+    for url in ('/api/daily-dashboard', '/api/monthly-dashboard', '/api/yearly-dashboard', '/api/time-intelligence'):
+        started = time.perf_counter()
+        for _ in range(20):
+            client.get(url)
+        print(f"ℹ️ {url}: {(time.perf_counter() - started) / 20 * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smoke test and benchmark the SQLite backend without external services.")
+    parser.add_argument("--days", type=int, default=90, help="Days of synthetic history before the benchmark")
+    parser.add_argument("--per-day", type=int, default=300)
+    parser.add_argument("--sales", type=int, default=500, help="Sales recorded through the API in the benchmark (0 to skip)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="sqlite_check_")
+    try:
+        os.environ["STORAGE_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = os.path.join(workdir, "cafe.db")
+        os.environ["USER_VERSION_CHECK_SECONDS"] = "0.2"
+        import app  # creates the schema, syncs the menu and bootstraps users
+
+        smoke(app)
+        if args.days:
+            started = datetime.now()
+            total = generate_sales_sqlite(app.store, date.today() - timedelta(days=args.days), args.days, args.per_day)
+            print(f"ℹ️ Generated {total} sales in {(datetime.now() - started).total_seconds():.1f}s")
+        query_plans(app.store)
+        if args.sales:
+            benchmark(app, args.sales)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if failures:
+        print(f"\n❌ {len(failures)} checks failed.")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Per-item, per-hour demand forecast for kitchen prep.
+
+Works from the daily rollups only: the last HISTORY_DAYS days are loaded in
+one aggregation into one flat array per item (day x hour counts). The daily
+level comes from exponential smoothing of the weekday-adjusted totals, and
+is split across hours by that weekday's historical hour profile.
+"""
+import os
+from array import array
+from datetime import datetime, timedelta
+
+from rollups import ROLLUP_COLLECTION, rollup_boundary, day_start
+
+HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", 56))
+SMOOTHING = float(os.getenv("FORECAST_SMOOTHING", 0.3))
+CACHE_DAYS = int(os.getenv("FORECAST_CACHE_DAYS", 2))
+HOURS = 24
+
+
+def ensure_forecast_indexes(db):
+    # Cached forecasts are only reused for their own target day
+    db.forecasts.create_index("generated_at", expireAfterSeconds=CACHE_DAYS * 86400)
+
+
+def load_series(db, match, start, end):
+    # {item_id: (name, array of HOURS counts per day from start)}
+    days = (end - start).days
+    series = {}
+    for row in db[ROLLUP_COLLECTION].aggregate([
+        {"$match": {**match, "date": {"$gte": start.strftime("%Y-%m-%d"), "$lt": end.strftime("%Y-%m-%d")}}},
+        {"$group": {
+            "_id": {"item_id": "$item_id", "date": "$date", "hour": "$hour"},
+            "name": {"$first": "$name"},
+            "count": {"$sum": "$count"}
+        }}
+    ]):
+        key = row["_id"]
+        if key["item_id"] not in series:
+            series[key["item_id"]] = (row["name"], array('d', bytes(8 * days * HOURS)))
+        day = (datetime.strptime(key["date"], "%Y-%m-%d") - start).days
+        series[key["item_id"]][1][day * HOURS + key["hour"]] += row["count"]
+    return series
+
+
+def forecast_item(counts, weekdays, target_weekday, alpha=SMOOTHING):
+    totals = [sum(counts[d * HOURS:(d + 1) * HOURS]) for d in range(len(weekdays))]
+
+    # Ignore the days before the item's first sale (new items, short history)
+    first = next((d for d, total in enumerate(totals) if total), len(totals))
+    counts = counts[first * HOURS:]
+    totals = totals[first:]
+    weekdays = weekdays[first:]
+    days = len(totals)
+
+    overall = sum(totals) / days if days else 0
+    if not overall:
+        return 0.0, [0.0] * HOURS
+
+    # Weekday seasonal factors
+    by_weekday = [[] for _ in range(7)]
+    for total, wd in zip(totals, weekdays):
+        by_weekday[wd].append(total)
+    factors = [(sum(v) / len(v) / overall) if v and sum(v) else 1.0 for v in by_weekday]
+
+    # Simple exponential smoothing of the deseasonalised daily totals
+    level = totals[0] / factors[weekdays[0]]
+    for total, wd in zip(totals[1:], weekdays[1:]):
+        level = alpha * (total / factors[wd]) + (1 - alpha) * level
+    expected = level * factors[target_weekday]
+
+    # Hour profile of the target weekday, falling back to all days
+    profile = [0.0] * HOURS
+    for d, wd in enumerate(weekdays):
+        if wd == target_weekday:
+            for h in range(HOURS):
+                profile[h] += counts[d * HOURS + h]
+    if not sum(profile):
+        for d in range(days):
+            for h in range(HOURS):
+                profile[h] += counts[d * HOURS + h]
+    norm = sum(profile)
+    return expected, [expected * p / norm for p in profile]
+
+
+def forecast_demand(db, match, target, cache_key):
+    target = day_start(target)
+    target_str = target.strftime("%Y-%m-%d")
+    boundary = rollup_boundary(db)
+    if boundary is None:
+        # No closed days rolled up yet, so there is no history to forecast from
+        return []
+    end = min(boundary, target)
+
+    # The history only grows once a day, so one forecast per target day and
+    # rollup boundary serves every request until the next day closes.
+    cache_id = f"{cache_key}:{target_str}:{end.strftime('%Y-%m-%d')}"
+    cached = db.forecasts.find_one({"_id": cache_id})
+    if cached:
+        return cached["items"]
+
+    start = end - timedelta(days=HISTORY_DAYS)
+    weekdays = [(start + timedelta(days=d)).weekday() for d in range(HISTORY_DAYS)]
+
+    items = []
+    for item_id, (name, counts) in load_series(db, match, start, end).items():
+        total, hourly = forecast_item(counts, weekdays, target.weekday())
+        if total < 0.05:
+            continue
+        items.append({
+            "item_id": item_id,
+            "name": name,
+            "expected_total": round(total, 1),
+            "hourly": {str(h): round(v, 1) for h, v in enumerate(hourly) if v >= 0.05}
+        })
+    items.sort(key=lambda i: i["expected_total"], reverse=True)
+
+    db.forecasts.update_one(
+        {"_id": cache_id},
+        {"$set": {"date": target_str, "items": items, "generated_at": datetime.now()}},
+        upsert=True
+    )
+    return items
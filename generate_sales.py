@@ -0,0 +1,184 @@
+"""Synthetic sales generator for benchmarking dashboards at realistic scale.
+
+Sales follow a lunch/evening time-of-day curve, weekend seasonality, a Zipf
+popularity skew over the menu and a UPI-heavy payment mix, and use the same
+document shape as record_sale. Days are split across worker processes that
+each write with unordered insert_many batches, or to NDJSON for mongoimport:
+
+    python generate_sales.py --days 365 --per-day 400
+    python generate_sales.py --days 1095 --ndjson sales.ndjson
+    mongoimport --uri "$MONGO_URI" --collection sales --file sales.ndjson
+    python generate_sales.py --days 90 --sqlite cafe.db   # no MongoDB needed
+
+SQLite files are written from a single process, since SQLite serialises
+writers anyway.
+"""
+import os
+import random
+import shutil
+import argparse
+from datetime import datetime, date, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from bson import json_util
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+from sale_docs import build_sale
+from sqlite_storage import SQLiteStorage
+from outlets import DEFAULT_OUTLET_ID, outlet_ids
+from rollups import build_daily_rollups, ensure_daily_rollups, rolled_up_before, day_start
+
+load_dotenv()
+
+# Relative traffic per hour of day (closed before 7 and after 22)
+HOUR_WEIGHTS = {
+    7: 1, 8: 2, 9: 3, 10: 4, 11: 6, 12: 9, 13: 10, 14: 8, 15: 6,
+    16: 6, 17: 8, 18: 10, 19: 10, 20: 8, 21: 5, 22: 2
+}
+# Monday .. Sunday
+WEEKDAY_FACTORS = [0.85, 0.8, 0.85, 0.9, 1.05, 1.3, 1.25]
+PAYMENT_MIX = {"UPI": 0.45, "PhonePe": 0.3, "Cash": 0.25}
+ZIPF_EXPONENT = 1.1
+
+
+def popularity_weights(menu, seed):
+    ranks = list(range(1, len(menu) + 1))
+    random.Random(seed).shuffle(ranks)
+    return [1.0 / (rank ** ZIPF_EXPONENT) for rank in ranks]
+
+
+def generate_day(rng, day, outlet_id, menu, weights, staff, per_day):
+    count = max(0, int(rng.gauss(per_day * WEEKDAY_FACTORS[day.weekday()], per_day * 0.1)))
+    hours = rng.choices(list(HOUR_WEIGHTS), list(HOUR_WEIGHTS.values()), k=count)
+    items = rng.choices(menu, weights, k=count)
+    payments = rng.choices(list(PAYMENT_MIX), list(PAYMENT_MIX.values()), k=count)
+    base = datetime(day.year, day.month, day.day)
+
+    for hour, item, payment in zip(hours, items, payments):
+        when = base + timedelta(hours=hour, seconds=rng.randrange(3600))
+        yield build_sale(item, payment, rng.choice(staff), outlet_id, when)
+
+
+def _generate_chunk(task):
+    days, opts, worker = task
+    rng = random.Random(f"{opts['seed']}-{worker}")
+    weights = popularity_weights(opts["menu"], opts["seed"])
+
+    if opts["ndjson"]:
+        part = f"{opts['ndjson']}.part{worker}"
+        out = open(part, "w", encoding="utf-8")
+    else:
+        part = None
+        sales = MongoClient(opts["uri"]).get_database().sales
+
+    written, batch = 0, []
+    for day in days:
+        for outlet_id in opts["outlets"]:
+            staff = opts["staff"].get(outlet_id) or ["staff1"]
+            for sale in generate_day(rng, day, outlet_id, opts["menu"], weights, staff, opts["per_day"]):
+                batch.append(sale)
+                if len(batch) >= opts["batch_size"]:
+                    written += _flush(batch, out if part else sales)
+                    batch = []
+    if batch:
+        written += _flush(batch, out if part else sales)
+    if part:
+        out.close()
+    return part, written
+
+
+def _flush(batch, target):
+    if hasattr(target, "insert_many"):
+        target.insert_many(batch, ordered=False)
+    else:
+        target.writelines(json_util.dumps(doc) + "\n" for doc in batch)
+    return len(batch)
+
+
+def generate_sales(db, uri, start, days, per_day, outlets=None, workers=None, batch_size=5000, ndjson=None, seed=42):
+    menu = list(db.menu_items.find({"is_active": {"$ne": False}}, {"_id": 0, "item_id": 1, "name": 1, "category": 1, "price": 1}))
+    if not menu:
+        raise RuntimeError("menu_items is empty; start the app once to sync the menu first")
+    outlets = outlets or outlet_ids(db)
+    staff = {}
+    for user in db.users.find({"outlet_id": {"$in": outlets}, "is_active": {"$ne": False}}, {"username": 1, "outlet_id": 1}):
+        staff.setdefault(user["outlet_id"], []).append(user["username"])
+
+    all_days = [start + timedelta(days=d) for d in range(days)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(all_days)))
+    opts = {"uri": uri, "menu": menu, "outlets": outlets, "staff": staff, "per_day": per_day,
+            "batch_size": batch_size, "ndjson": ndjson, "seed": seed}
+    tasks = [(all_days[w::workers], opts, w) for w in range(workers)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_generate_chunk, tasks))
+
+    if ndjson:
+        with open(ndjson, "wb") as out:
+            for part, _ in results:
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, out)
+                os.remove(part)
+    return sum(written for _, written in results)
+
+
+def generate_sales_sqlite(store, start, days, per_day, batch_size=5000, seed=42):
+    menu = [item for item in store.all_menu_items(["item_id", "name", "category", "price", "is_active"]) if item["is_active"]]
+    if not menu:
+        raise RuntimeError("menu_items is empty; start the app once to sync the menu first")
+    staff = [u["username"] for u in store.list_users() if u["outlet_id"] == DEFAULT_OUTLET_ID and u["is_active"]] or ["staff1"]
+    rng = random.Random(f"{seed}-0")
+    weights = popularity_weights(menu, seed)
+
+    written, batch = 0, []
+    for d in range(days):
+        for sale in generate_day(rng, start + timedelta(days=d), DEFAULT_OUTLET_ID, menu, weights, staff, per_day):
+            batch.append(sale)
+            if len(batch) >= batch_size:
+                written += store.import_sales(batch)
+                batch = []
+    if batch:
+        written += store.import_sales(batch)
+    return written
+
+
+def backfill_rollups(db, start, end):
+    end = min(day_start(end), day_start(date.today()))
+    if rolled_up_before(db) is None:
+        # Nothing rolled up yet: roll up everything from the first sale
+        ensure_daily_rollups(db)
+    elif day_start(start) < end:
+        build_daily_rollups(db, start, end)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate realistic synthetic sales.")
+    parser.add_argument("--days", type=int, default=365, help="Days of history, ending yesterday")
+    parser.add_argument("--per-day", type=int, default=400, help="Average sales per outlet per day")
+    parser.add_argument("--outlets", help="Comma-separated outlet ids (default: all registered outlets)")
+    parser.add_argument("--workers", type=int, default=None, help="Generator processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--ndjson", help="Write a mongoimport-ready NDJSON file instead of inserting")
+    parser.add_argument("--sqlite", help="Write into this SQLite database (STORAGE_BACKEND=sqlite) instead of MongoDB")
+    parser.add_argument("--rollups", action="store_true", help="Backfill daily rollups for the generated days")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = date.today() - timedelta(days=args.days)
+    started = datetime.now()
+    if args.sqlite:
+        store = SQLiteStorage(args.sqlite)
+        store.setup()
+        total = generate_sales_sqlite(store, start, args.days, args.per_day, args.batch_size, args.seed)
+    else:
+        uri = os.getenv("MONGO_URI")
+        db = MongoClient(uri).get_database()
+        outlets = args.outlets.split(",") if args.outlets else None
+        total = generate_sales(db, uri, start, args.days, args.per_day, outlets, args.workers,
+                               args.batch_size, args.ndjson, args.seed)
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"✅ Generated {total} sales in {elapsed:.1f}s ({total / max(elapsed, 0.001):.0f}/s)")
+
+    if args.rollups and not args.ndjson and not args.sqlite:
+        backfill_rollups(db, start, date.today())
+        print("✅ Daily rollups backfilled.")
@@ -0,0 +1,218 @@
+"""Ingredient stock worked out lazily from recipes and sales.
+
+record_sale never touches inventory. Stock on hand is the last stock count
+minus recipe x units sold since that count. For every count the per-item
+units sold on closed days are cached in `inventory_snapshots` and only
+advanced by the days rolled up since the previous read, so a read costs one
+small rollup scan per new day plus the raw sales of the still-open days.
+Sales still waiting in the local sale journal are not counted yet.
+"""
+from datetime import datetime, timedelta
+
+from rollups import ROLLUP_COLLECTION, rollup_boundary, day_start
+
+SNAPSHOT_COLLECTION = "inventory_snapshots"
+
+
+def ensure_inventory_indexes(db):
+    db.stock_counts.create_index([("outlet_id", 1), ("ingredient", 1), ("counted_at", -1)])
+
+
+def ingredient_key(name):
+    # Ingredient names are used as document keys
+    return str(name or "").strip().lower().replace(".", "").replace("$", "")
+
+
+def parse_counts(entries):
+    # Returns (counts, errors), like menu_catalog.parse_rows
+    if not isinstance(entries, list):
+        return [], ["Expected a list of counts"]
+    counts, errors = [], []
+    for line, entry in enumerate(entries, start=1):
+        ingredient = ingredient_key(entry.get("ingredient") if isinstance(entry, dict) else None)
+        if not ingredient:
+            errors.append(f"Row {line}: ingredient is required")
+            continue
+        try:
+            count = {"ingredient": ingredient, "quantity": float(entry.get("quantity"))}
+            if entry.get("reorder_level") is not None:
+                count["reorder_level"] = float(entry["reorder_level"])
+        except (TypeError, ValueError):
+            errors.append(f"Row {line}: quantity and reorder_level must be numbers")
+            continue
+        if count["quantity"] < 0:
+            errors.append(f"Row {line}: quantity cannot be negative")
+            continue
+        if entry.get("unit"):
+            count["unit"] = str(entry["unit"])
+        counts.append(count)
+    return counts, errors
+
+
+def latest_counts(db, outlet_id, ingredients=None):
+    match = {"outlet_id": outlet_id}
+    if ingredients:
+        match["ingredient"] = {"$in": list(ingredients)}
+    return {row["_id"]: row["count"] for row in db.stock_counts.aggregate([
+        {"$match": match},
+        {"$sort": {"ingredient": 1, "counted_at": -1}},
+        {"$group": {"_id": "$ingredient", "count": {"$first": "$$ROOT"}}}
+    ])}
+
+
+def record_counts(db, outlet_id, counts, counted_by):
+    # Unit and reorder level carry over from the previous count when omitted
+    previous = latest_counts(db, outlet_id, [c["ingredient"] for c in counts])
+    now = datetime.now()
+    docs = []
+    for count in counts:
+        last = previous.get(count["ingredient"], {})
+        docs.append({
+            "outlet_id": outlet_id,
+            "ingredient": count["ingredient"],
+            "quantity": count["quantity"],
+            "unit": count.get("unit", last.get("unit", "")),
+            "reorder_level": count.get("reorder_level", last.get("reorder_level", 0)),
+            "counted_at": now,
+            "counted_by": counted_by
+        })
+    if docs:
+        db.stock_counts.insert_many(docs)
+    return len(docs)
+
+
+def set_recipe(db, item, ingredients):
+    # ingredients: {ingredient: quantity used per unit sold}; empty removes it
+    recipe = {ingredient_key(k): float(v) for k, v in ingredients.items() if ingredient_key(k) and float(v) > 0}
+    if not recipe:
+        db.recipes.delete_one({"_id": item["item_id"]})
+        return {}
+    db.recipes.update_one(
+        {"_id": item["item_id"]},
+        {"$set": {"name": item["name"], "ingredients": recipe, "updated_at": datetime.now()}},
+        upsert=True
+    )
+    return recipe
+
+
+def sold_pipeline(match, units):
+    return [
+        {"$match": match},
+        {"$group": {"_id": {"$toInt": "$item_id"}, "units": {"$sum": units}}}
+    ]
+
+
+def sold_in_rollups(db, outlet_id, start, end):
+    match = {"outlet_id": outlet_id, "date": {"$gte": start.strftime("%Y-%m-%d"), "$lt": end.strftime("%Y-%m-%d")}}
+    return {row["_id"]: row["units"] for row in db[ROLLUP_COLLECTION].aggregate(sold_pipeline(match, "$count"))}
+
+
+def sold_in_sales(db, outlet_id, start, end=None):
+    timestamp = {"$gte": start}
+    if end is not None:
+        timestamp["$lt"] = end
+    match = {"outlet_id": outlet_id, "timestamp": timestamp}
+    return {row["_id"]: row["units"] for row in db.sales.aggregate(sold_pipeline(match, 1))}
+
+
+def _add(total, sold):
+    for item_id, units in sold.items():
+        total[str(item_id)] = total.get(str(item_id), 0) + units
+    return total
+
+
+def _advance(db, outlet_id, window, boundary, rollup_reads):
+    # Brings a count's closed-day totals up to the rollup boundary. The rest
+    # of the count's own day comes from raw sales once, then whole days from
+    # the rollups; windows at the same point share one rollup read.
+    through = window.get("through")
+    if through is None:
+        first_full_day = day_start(window["start"]) + timedelta(days=1)
+        if first_full_day > boundary:
+            return False
+        window["sold"] = _add({}, sold_in_sales(db, outlet_id, window["start"], first_full_day))
+        through = first_full_day
+    elif through >= boundary:
+        return False
+
+    if through < boundary:
+        if through not in rollup_reads:
+            rollup_reads[through] = sold_in_rollups(db, outlet_id, through, boundary)
+        _add(window["sold"], rollup_reads[through])
+    window["through"] = boundary
+    return True
+
+
+def inventory_status(db, outlet_id):
+    # Before the first rollup build everything is read from raw sales
+    boundary = rollup_boundary(db) or datetime.min
+    counts = latest_counts(db, outlet_id)
+    recipes = {r["_id"]: r["ingredients"] for r in db.recipes.find({}, {"ingredients": 1})}
+    snapshot = db[SNAPSHOT_COLLECTION].find_one({"_id": outlet_id}) or {}
+
+    # One window per stock-take still in use
+    cached = {w["start"]: w for w in snapshot.get("windows", [])}
+    windows = {}
+    for count in counts.values():
+        start = count["counted_at"]
+        if start not in windows:
+            windows[start] = cached.get(start) or {"start": start, "through": None, "sold": {}}
+    changed = set(windows) != set(cached)
+
+    rollup_reads = {}
+    for window in windows.values():
+        changed = _advance(db, outlet_id, window, boundary, rollup_reads) or changed
+
+    # Open days are read fresh every time and never cached
+    open_reads = {}
+    ingredients = set(counts)
+    for recipe in recipes.values():
+        ingredients.update(recipe)
+
+    rows, low = [], []
+    for ingredient in sorted(ingredients):
+        count = counts.get(ingredient)
+        if count is None:
+            rows.append({"ingredient": ingredient, "on_hand": None, "counted_at": None})
+            continue
+
+        window = windows[count["counted_at"]]
+        open_start = max(count["counted_at"], boundary)
+        if open_start not in open_reads:
+            open_reads[open_start] = sold_in_sales(db, outlet_id, open_start)
+
+        used = 0
+        for sold in (window["sold"], open_reads[open_start]):
+            for item_id, units in sold.items():
+                used += recipes.get(int(item_id), {}).get(ingredient, 0) * units
+
+        on_hand = round(count["quantity"] - used, 3)
+        is_low = on_hand <= count.get("reorder_level", 0)
+        if is_low:
+            low.append(ingredient)
+        rows.append({
+            "ingredient": ingredient,
+            "unit": count.get("unit", ""),
+            "counted": count["quantity"],
+            "counted_at": count["counted_at"].strftime("%Y-%m-%d %H:%M"),
+            "used_since_count": round(used, 3),
+            "on_hand": on_hand,
+            "reorder_level": count.get("reorder_level", 0),
+            "low": is_low
+        })
+
+    # Alerts only fire when an ingredient crosses its reorder level
+    new_alerts = sorted(set(low) - set(snapshot.get("low", [])))
+    if changed or low != snapshot.get("low", []):
+        db[SNAPSHOT_COLLECTION].update_one(
+            {"_id": outlet_id},
+            {"$set": {"windows": list(windows.values()), "low": low, "updated_at": datetime.now()}},
+            upsert=True
+        )
+
+    return {
+        "outlet_id": outlet_id,
+        "ingredients": rows,
+        "alerts": low,
+        "new_alerts": new_alerts
+    }
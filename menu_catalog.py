@@ -0,0 +1,274 @@
+"""The master menu and bulk catalog import/export.
+
+An import is diffed against one read of `menu_items` (new, changed and
+deactivated items) so it can be previewed, then applied with a single
+bulk_write plus one insert_many into `price_logs` for the price changes.
+"""
+import io
+import csv
+import json
+from datetime import datetime
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+MASTER_MENU = [
+    # MILKSHAKES (25)
+    {"name": "Oreo Milkshake", "category": "Milkshakes", "price": 100, "description": "Rich and creamy milkshake featuring Oreo cookies blended with chilled milk."},
+    {"name": "Belgian Dark Chocolate Milkshake", "category": "Milkshakes", "price": 100, "description": "Premium dark chocolate blended into a smooth and indulgent shake."},
+    {"name": "Dry Fruit Milkshake", "category": "Milkshakes", "price": 150, "description": "Energy-packed milkshake blended with cashews, almonds, pistachios and chilled milk."},
+    {"name": "Brownie Milkshake", "category": "Milkshakes", "price": 120, "description": "Chocolate brownie blended with creamy milk for a rich dessert-style shake."},
+    {"name": "Strawberry Milkshake", "category": "Milkshakes", "price": 80, "description": "Fresh strawberry flavored shake, smooth and refreshing."},
+    {"name": "Watermelon Milkshake", "category": "Milkshakes", "price": 80, "description": "Light and refreshing milkshake made with chilled watermelon."},
+    {"name": "Blueberry Milkshake", "category": "Milkshakes", "price": 90, "description": "Sweet and tangy blueberry milkshake with smooth texture."},
+    {"name": "Black Current Milkshake", "category": "Milkshakes", "price": 90, "description": "Fruity and refreshing black currant flavored milkshake."},
+    {"name": "Butterscotch Milkshake", "category": "Milkshakes", "price": 80, "description": "Classic butterscotch flavor blended into creamy chilled milk."},
+    {"name": "Mango Milkshake", "category": "Milkshakes", "price": 80, "description": "Sweet tropical mango milkshake made with fresh mango crush."},
+    {"name": "Orange Milkshake", "category": "Milkshakes", "price": 80, "description": "Citrusy orange milkshake blended into creamy milk."},
+    {"name": "Banana Milkshake", "category": "Milkshakes", "price": 80, "description": "Creamy banana blended with milk for natural sweetness."},
+    {"name": "Vanilla Milkshake", "category": "Milkshakes", "price": 80, "description": "Classic vanilla flavored creamy milkshake."},
+    {"name": "Pineapple Milkshake", "category": "Milkshakes", "price": 80, "description": "Refreshing pineapple crush blended into chilled milk."},
+    {"name": "Guava Milkshake", "category": "Milkshakes", "price": 80, "description": "Sweet guava blended into a smooth and fruity shake."},
+    {"name": "Kiwi Milkshake", "category": "Milkshakes", "price": 80, "description": "Tangy kiwi flavored refreshing milkshake."},
+    {"name": "Kolkata Pan Milkshake", "category": "Milkshakes", "price": 100, "description": "Milkshake infused with traditional paan flavor."},
+    {"name": "Pista Milkshake", "category": "Milkshakes", "price": 80, "description": "Creamy pistachio flavored milkshake."},
+    {"name": "Banana Bonkers Milkshake", "category": "Milkshakes", "price": 90, "description": "Banana based milkshake with enhanced sweetness."},
+    {"name": "Kitkat Milkshake", "category": "Milkshakes", "price": 100, "description": "Creamy chocolate milkshake blended with Kitkat pieces."},
+    {"name": "5 Star Chocolate Milkshake", "category": "Milkshakes", "price": 100, "description": "Chocolate milkshake blended with 5 Star chocolate."},
+    {"name": "Gems Milkshake", "category": "Milkshakes", "price": 100, "description": "Colorful Gems chocolate blended into a creamy milkshake."},
+    {"name": "Snickers Milkshake", "category": "Milkshakes", "price": 100, "description": "Snickers chocolate blended into rich milkshake."},
+    {"name": "Choco Butterscotch Milkshake", "category": "Milkshakes", "price": 100, "description": "Butterscotch and chocolate blended into creamy milk."},
+    {"name": "Choco-nut Crunch Supreme", "category": "Milkshakes", "price": 120, "description": "Chocolate and nut infused premium thick milkshake."},
+
+    # ICE CREAM SHAKES (23)
+    {"name": "Kitkat Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Ice cream blended with Kitkat chocolate and milk."},
+    {"name": "Mango Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Mango flavored ice cream blended into thick shake."},
+    {"name": "Belgian Dark Chocolate Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Premium Belgian chocolate ice cream blended smoothly."},
+    {"name": "Blended Brownie Ice Cream Shake", "category": "Ice Cream Shakes", "price": 180, "description": "Chocolate brownie blended with creamy ice cream."},
+    {"name": "Gems Ice Cream Shake", "category": "Ice Cream Shakes", "price": 80, "description": "Ice cream blended with Gems chocolates."},
+    {"name": "Black Current Ice Cream Shake", "category": "Ice Cream Shakes", "price": 80, "description": "Black currant ice cream blended into smooth shake."},
+    {"name": "Butterscotch Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Butterscotch ice cream blended into creamy shake."},
+    {"name": "Watermelon Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Watermelon flavored ice cream blended with milk."},
+    {"name": "Pineapple Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Pineapple flavored ice cream blended smoothly."},
+    {"name": "Guava Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Guava flavored ice cream blended creamy."},
+    {"name": "Vanilla Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Classic vanilla ice cream blended shake."},
+    {"name": "Orange Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Citrusy orange flavored ice cream shake."},
+    {"name": "Banana Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Banana flavored creamy ice cream shake."},
+    {"name": "Strawberry Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Strawberry ice cream blended into thick shake."},
+    {"name": "Kiwi Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Kiwi flavored ice cream blended smoothly."},
+    {"name": "Kolkata Pan Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Paan flavored ice cream blended shake."},
+    {"name": "Pista Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Pistachio ice cream blended into creamy shake."},
+    {"name": "Blueberry Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Blueberry flavored ice cream shake."},
+    {"name": "Chocolate Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Chocolate ice cream blended into smooth shake."},
+    {"name": "Banana Bonkers Ice Cream Shake", "category": "Ice Cream Shakes", "price": 170, "description": "Banana ice cream shake topped with chocolate."},
+    {"name": "5 Star Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "5 Star chocolate blended into ice cream shake."},
+    {"name": "Choco Butterscotch Ice Cream Shake", "category": "Ice Cream Shakes", "price": 150, "description": "Chocolate and butterscotch blended ice cream shake."},
+    {"name": "Belgian Dark Chocolate Ice Cream Shake (Special)", "category": "Ice Cream Shakes", "price": 150, "description": "Premium Belgian chocolate ice cream blend."},
+
+    # SNACKS (6)
+    {"name": "Peri Peri French Fries", "category": "Snacks", "price": 100, "description": "Crispy fries coated in peri peri spice blend."},
+    {"name": "Masala Fries", "category": "Snacks", "price": 70, "description": "Classic fries tossed with spicy masala seasoning."},
+    {"name": "Peri Smilies", "category": "Snacks", "price": 50, "description": "Smiley shaped potato snacks with peri peri flavor."},
+    {"name": "Cheesy Fries", "category": "Snacks", "price": 150, "description": "Loaded fries topped with melted cheese."},
+    {"name": "Classic Salted Smilies", "category": "Snacks", "price": 50, "description": "Golden fried smiley potatoes lightly salted."},
+    {"name": "Classic Salted French Fries", "category": "Snacks", "price": 85, "description": "Classic salted crispy French fries."},
+
+    # COMBO OFFERS (5)
+    {"name": "Mango Milkshake + French Fries", "category": "Combo Offers", "price": 140, "description": "Sweet mango milkshake paired with crispy fries."},
+    {"name": "Watermelon Milkshake + Classic French Fries", "category": "Combo Offers", "price": 140, "description": "Refreshing watermelon shake with salted fries."},
+    {"name": "Vanilla Milkshake + Classic French Fries", "category": "Combo Offers", "price": 140, "description": "Classic vanilla shake with crispy fries."},
+    {"name": "Chocolate Milkshake + Classic French Fries", "category": "Combo Offers", "price": 160, "description": "Chocolate milkshake served with fries."},
+    {"name": "Orange Milkshake + Classic French Fries", "category": "Combo Offers", "price": 140, "description": "Citrusy orange milkshake paired with salted fries."}
+]
+
+
+EXPORT_FIELDS = ["item_id", "name", "category", "price", "description", "is_active", "image_url"]
+DIFF_FIELDS = ["name", "category", "price", "description", "is_active", "image_url"]
+MAX_PRICE = 10000
+
+
+def export_items(menu_items):
+    projection = {"_id": 0, **{field: 1 for field in EXPORT_FIELDS}}
+    return list(menu_items.find({}, projection).sort("item_id", 1))
+
+
+def to_csv(items):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for item in items:
+        writer.writerow({**item, "is_active": item.get("is_active", True)})
+    return out.getvalue()
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y", "active")
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def parse_rows(raw, fmt="csv"):
+    # Returns (rows, errors); rows only carry the columns the file provides
+    if fmt == "json":
+        data = json.loads(raw) if isinstance(raw, str) else raw
+        if isinstance(data, dict):
+            data = data.get("items", [])
+        if not isinstance(data, list):
+            return [], ["Expected a list of items"]
+    else:
+        data = list(csv.DictReader(io.StringIO(raw)))
+
+    rows, errors, names, ids = [], [], set(), set()
+    for line, entry in enumerate(data, start=1):
+        if not isinstance(entry, dict):
+            errors.append(f"Row {line}: expected an object")
+            continue
+        row = {"item_id": None}
+        try:
+            if not _blank(entry.get("item_id")):
+                row["item_id"] = int(entry["item_id"])
+            row["price"] = float(entry.get("price"))
+        except (TypeError, ValueError):
+            errors.append(f"Row {line}: item_id and price must be numbers")
+            continue
+
+        row["name"] = str(entry.get("name") or "").strip()
+        row["category"] = str(entry.get("category") or "").strip()
+        if not row["name"] or not row["category"]:
+            errors.append(f"Row {line}: name and category are required")
+            continue
+        if not 0 < row["price"] <= MAX_PRICE:
+            errors.append(f"Row {line}: price must be between 0 and {MAX_PRICE}")
+            continue
+        if row["name"] in names or (row["item_id"] is not None and row["item_id"] in ids):
+            errors.append(f"Row {line}: duplicate item '{row['name']}'")
+            continue
+        names.add(row["name"])
+        if row["item_id"] is not None:
+            ids.add(row["item_id"])
+
+        if entry.get("description") is not None:
+            row["description"] = str(entry["description"])
+        if not _blank(entry.get("is_active")):
+            row["is_active"] = _as_bool(entry["is_active"])
+        if entry.get("image_url") is not None:
+            row["image_url"] = str(entry["image_url"])
+        rows.append(row)
+    return rows, errors
+
+
+def diff_menu(existing, rows, deactivate_missing=True):
+    # existing: the current menu_items documents; new items get their ids here
+    # so the preview shows exactly what apply will write
+    by_id = {item["item_id"]: item for item in existing}
+    by_name = {item["name"]: item for item in existing}
+    next_id = max([i for i in by_id if isinstance(i, int)] + [0]) + 1
+
+    # Explicit ids of new rows are reserved first, so a generated id never
+    # collides with one given further down the file
+    reserved = {row["item_id"] for row in rows if row.get("item_id") is not None
+                and row["item_id"] not in by_id and row["name"] not in by_name}
+
+    diff = {"new": [], "changed": [], "deactivated": [], "unchanged": 0}
+    matched = set()
+    for row in rows:
+        item = by_id.get(row.get("item_id")) or by_name.get(row["name"])
+        if item is None:
+            new = dict(row)
+            if new.get("item_id") not in reserved:
+                while next_id in reserved:
+                    next_id += 1
+                new["item_id"] = next_id
+                next_id += 1
+            diff["new"].append(new)
+            continue
+
+        matched.add(item["item_id"])
+        changes = {}
+        for field in DIFF_FIELDS:
+            if field not in row:
+                continue
+            old = item.get(field, True if field == "is_active" else "")
+            if row[field] != old:
+                changes[field] = {"old": old, "new": row[field]}
+        if changes:
+            diff["changed"].append({"item_id": item["item_id"], "name": item["name"], "changes": changes})
+        else:
+            diff["unchanged"] += 1
+
+    if deactivate_missing:
+        for item in existing:
+            if item["item_id"] not in matched and item.get("is_active", True):
+                diff["deactivated"].append({"item_id": item["item_id"], "name": item["name"]})
+    return diff
+
+
+def diff_writes(diff, changed_by, reason="Menu import"):
+    # Backend-neutral writes for a diff: (documents to insert,
+    # [(item_id, fields to set)], {index into the updates: price log})
+    now = datetime.now()
+    inserts, updates, logs = [], [], {}
+    for row in diff["new"]:
+        inserts.append({
+            "item_id": row["item_id"],
+            "name": row["name"],
+            "category": row["category"],
+            "price": row["price"],
+            "description": row.get("description", ""),
+            "image_url": row.get("image_url", ""),
+            "order_count": 0,
+            "is_active": row.get("is_active", True),
+            "created_at": now,
+            "updated_at": now
+        })
+
+    for change in diff["changed"]:
+        update = {field: c["new"] for field, c in change["changes"].items()}
+        update["updated_at"] = now
+        if "price" in change["changes"]:
+            # A list price replaces any running offer, as in update_price
+            update["is_offer"] = False
+            update["original_price"] = 0
+            logs[len(updates)] = {
+                "item_id": change["item_id"],
+                "item_name": update.get("name", change["name"]),
+                "old_price": change["changes"]["price"]["old"],
+                "new_price": change["changes"]["price"]["new"],
+                "is_offer": False,
+                "reason": reason,
+                "changed_by": changed_by,
+                "changed_at": now
+            }
+        updates.append((change["item_id"], update))
+
+    for item in diff["deactivated"]:
+        updates.append((item["item_id"], {"is_active": False, "updated_at": now}))
+    return inserts, updates, logs
+
+
+def diff_operations(diff, changed_by, reason="Menu import"):
+    inserts, updates, update_logs = diff_writes(diff, changed_by, reason)
+    ops = [InsertOne(doc) for doc in inserts]
+    ops += [UpdateOne({"item_id": item_id}, {"$set": fields}) for item_id, fields in updates]
+    logs = {len(inserts) + i: log for i, log in update_logs.items()}
+    return ops, logs
+
+
+def apply_menu_diff(db, diff, changed_by, reason="Menu import"):
+    # Returns the write errors (empty on success); price logs are only
+    # written for the updates that went through
+    ops, logs = diff_operations(diff, changed_by, reason)
+    errors = []
+    if ops:
+        try:
+            db.menu_items.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            for err in errors:
+                logs.pop(err["index"], None)
+    if logs:
+        db.price_logs.insert_many(list(logs.values()), ordered=False)
+    return [{"index": err["index"], "error": err.get("errmsg", "")} for err in errors]
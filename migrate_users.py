@@ -1,13 +1,10 @@
 import os
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from dotenv import load_dotenv
-from flask_bcrypt import Bcrypt
-from flask import Flask
 
-load_dotenv()
+from provision_users import hash_passwords
 
-app = Flask(__name__)
-bcrypt = Bcrypt(app)
+load_dotenv()
 
 def migrate_passwords():
     mongo_uri = os.getenv("MONGO_URI")
@@ -16,17 +13,21 @@ def migrate_passwords():
     users = db.users
     
     # We can't actually re-hash pbkdf2 to bcrypt without the plaintext.
-    # But we can check which users have bad hashes and reset them to something known or just report them.
-    # For this exercise, let's reset 'admin' to 'admin' if it has a werkzeug hash.
-    
-    for user in users.find():
-        pw = user.get('password', '')
-        if not pw.startswith('$2b$'):
-            print(f"User {user['username']} has non-bcrypt hash. Resetting to default (identical to username)...")
-            new_hash = bcrypt.generate_password_hash(user['username']).decode('utf-8')
-            users.update_one({"_id": user['_id']}, {"$set": {"password": new_hash}})
-            print(f"Updated {user['username']}")
+    # Users with a non-bcrypt hash are reset to a known default (identical to username).
+    stale = [u['username'] for u in users.find({"password": {"$not": {"$regex": r"^\$2b\$"}}}, {"username": 1})]
+    if not stale:
+        print("All users already have bcrypt hashes.")
+        return
+
+    for username in stale:
+        print(f"User {username} has non-bcrypt hash. Resetting to default (identical to username)...")
+
+    hashes = hash_passwords(stale)
+    users.bulk_write(
+        [UpdateOne({"username": username}, {"$set": {"password": hashed}}) for username, hashed in zip(stale, hashes)],
+        ordered=False
+    )
+    print(f"Updated {len(stale)} users")
 
 if __name__ == "__main__":
-    with app.app_context():
-        migrate_passwords()
+    migrate_passwords()
@@ -0,0 +1,235 @@
+"""MongoDB storage backend (the default).
+
+app.py reaches the catalog, sales, users and price logs through a storage
+object; sqlite_storage.py implements the same methods for single-counter
+deployments. Rollups, archives, outlets and the analytics built on them only
+exist here, so app.py uses `db` directly for those routes.
+"""
+from datetime import datetime
+
+from rollups import ROLLUP_COLLECTION, ensure_rollup_indexes, migrate_rollup_ids, roll_up_late_sales, summary_group, merge_summaries, merge_grouped
+from archive_sales import archived_before
+from order_counts import OrderCountBuffer
+from sale_journal import SaleJournal
+from catalog_cache import CatalogCache, apply_override
+from menu_catalog import diff_menu, apply_menu_diff
+from inventory import ensure_inventory_indexes
+from forecast import ensure_forecast_indexes
+from price_history import ensure_price_log_indexes
+from outlets import ensure_default_outlet, outlet_match, backfill_outlet_ids
+
+SALE_FILTERS = ("date", "month", "year")
+
+
+def split_by_archive(db, match):
+    # Sales older than the archive boundary only survive as rollups, so
+    # historical queries read the hot collection and the rollups side by side.
+    boundary = archived_before(db)
+    if not boundary:
+        return match, None
+    hot = {"$and": [match, {"date": {"$gte": boundary}}]}
+    cold = {"$and": [match, {"date": {"$lt": boundary}}]}
+    return hot, cold
+
+# Query builders below are shared with check_query_plans.py, which explains
+# them against a seeded database to catch lost index coverage.
+
+def menu_items_query(category=None, search_query=None):
+    # Only show active items for sales entry
+    query = {"is_active": {"$ne": False}}
+
+    if category and category != 'All':
+        query["category"] = category
+
+    if search_query:
+        search_regex = {"$regex": search_query, "$options": "i"}
+        if "category" in query:
+            query["name"] = search_regex
+        else:
+            query["$or"] = [{"name": search_regex}, {"category": search_regex}]
+    return query
+
+
+def summary_pipelines(db, match):
+    hot, cold = split_by_archive(db, match)
+    return (
+        [{"$match": hot}, summary_group()],
+        [{"$match": cold}, summary_group("$revenue", "$count")] if cold else None
+    )
+
+
+def grouped_pipelines(db, match, field):
+    hot, cold = split_by_archive(db, match)
+    return (
+        [{"$match": hot}, {"$group": {"_id": f"${field}", "revenue": {"$sum": "$price"}, "count": {"$sum": 1}}}],
+        [{"$match": cold}, {"$group": {"_id": f"${field}", "revenue": {"$sum": "$revenue"}, "count": {"$sum": "$count"}}}] if cold else None
+    )
+
+
+class MongoStorage:
+    name = "mongo"
+
+    def __init__(self, db, journal_path):
+        self.db = db
+        self.menu_items = db.menu_items
+        self.sales = db.sales
+        self.users = db.users
+
+        # order_count increments are coalesced per worker and flushed in bulk
+        self.order_count_buffer = OrderCountBuffer(self.menu_items)
+        # Sales are journaled locally and shipped to MongoDB in the background,
+        # so the counter never waits on Atlas. Items come from an in-process
+        # menu snapshot.
+        self.catalog_cache = CatalogCache(self.menu_items, db.menu_overrides, db.catalog_meta)
+        self.sale_journal = SaleJournal(journal_path, self.sales, on_shipped=self._on_shipped)
+
+    def _on_shipped(self, shipped):
+        for sale in shipped:
+            self.order_count_buffer.add(sale["item_id"])
+        roll_up_late_sales(self.db, shipped)
+
+    def setup(self):
+        db = self.db
+        ensure_default_outlet(db)
+        backfill_outlet_ids(db)
+        migrate_rollup_ids(db)
+
+        # Ensure Unique Index on Name
+        self.menu_items.create_index("name", unique=True)
+        # Sale lookups by item_id; menu listing sorted by popularity
+        self.menu_items.create_index("item_id", unique=True)
+        self.menu_items.create_index([("order_count", -1)])
+        self.menu_items.create_index([("category", 1), ("order_count", -1)])
+
+        # Sales are queried per outlet by day/month/year and archived by timestamp.
+        # (outlet_id, timestamp) doubles as the shard key (see shard_setup.py).
+        self.sales.create_index([("outlet_id", 1), ("date", 1)])
+        self.sales.create_index([("outlet_id", 1), ("year", 1), ("month", 1)])
+        self.sales.create_index([("outlet_id", 1), ("timestamp", 1)])
+        self.users.create_index("username", unique=True)
+        self.users.create_index([("outlet_id", 1), ("role", 1)])
+        db.menu_overrides.create_index([("outlet_id", 1), ("item_id", 1)], unique=True)
+        ensure_rollup_indexes(db)
+        ensure_inventory_indexes(db)
+        ensure_forecast_indexes(db)
+        ensure_price_log_indexes(db)
+
+        self.sale_journal.start()
+
+    def health(self):
+        return {
+            "sale_journal_backlog": self.sale_journal.backlog(),
+            "sale_journal_error": self.sale_journal.last_error
+        }
+
+    # --- Catalog ---
+
+    def catalog_version(self):
+        meta = self.db.catalog_meta.find_one({"_id": "menu"})
+        return meta["version"] if meta else 0
+
+    def bump_catalog_version(self):
+        # POS clients cache the whole catalog and only refetch when this changes
+        self.db.catalog_meta.update_one({"_id": "menu"}, {"$inc": {"version": 1}}, upsert=True)
+        self.catalog_cache.invalidate()
+
+    def sync_menu(self, master_menu):
+        # 1. Initialize default fields for existing items if they don't exist
+        self.menu_items.update_many({"is_active": {"$exists": False}}, {"$set": {"is_active": True}})
+        self.menu_items.update_many({"order_count": {"$exists": False}}, {"$set": {"order_count": 0}})
+        self.menu_items.update_many({"created_at": {"$exists": False}}, {"$set": {"created_at": datetime.now()}})
+        self.menu_items.update_many({"updated_at": {"$exists": False}}, {"$set": {"updated_at": datetime.now()}})
+        self.menu_items.update_many({"image_url": {"$exists": False}}, {"$set": {"image_url": ""}})
+
+        # 2. Seed items from the master menu that are missing. Existing items are
+        # left alone so prices and imports made through the admin API survive restarts.
+        existing = list(self.menu_items.find({}, {"_id": 0, "item_id": 1, "name": 1, "is_active": 1}))
+        diff = diff_menu(existing, master_menu, deactivate_missing=False)
+        apply_menu_diff(self.db, {"new": diff["new"], "changed": [], "deactivated": []}, "system")
+        return len(diff["new"])
+
+    def menu_items_for(self, outlet_id, category=None, search=None):
+        # Sort by most sold first, then apply the outlet's overrides
+        items = self.menu_items.find(menu_items_query(category, search), {"_id": 0}).sort("order_count", -1)
+        overrides = {o["item_id"]: o for o in self.db.menu_overrides.find({"outlet_id": outlet_id}, {"_id": 0})}
+        items = [apply_override(item, overrides.get(item["item_id"])) for item in items]
+        return [item for item in items if item.get("is_active", True)]
+
+    def all_menu_items(self, fields=None):
+        projection = {"_id": 0, **{field: 1 for field in fields}} if fields else {"_id": 0}
+        return list(self.menu_items.find({}, projection).sort("item_id", 1))
+
+    def get_item(self, item_id):
+        return self.menu_items.find_one({"item_id": item_id}, {"_id": 0})
+
+    def lookup_item(self, item_id, outlet_id):
+        # Sale path: served from the in-process snapshot
+        return self.catalog_cache.get(item_id, outlet_id)
+
+    def add_item(self, item):
+        last_item = self.menu_items.find_one(sort=[("item_id", -1)])
+        item["item_id"] = (last_item["item_id"] + 1) if last_item else 1
+        self.menu_items.insert_one(item)
+        return item["item_id"]
+
+    def update_item(self, item_id, fields):
+        return self.menu_items.update_one({"item_id": item_id}, {"$set": fields}).matched_count > 0
+
+    def apply_menu_diff(self, diff, changed_by):
+        return apply_menu_diff(self.db, diff, changed_by)
+
+    def outlet_exists(self, outlet_id):
+        return self.db.outlets.find_one({"_id": outlet_id}) is not None
+
+    # --- Sales ---
+
+    def record_sale(self, sale):
+        return str(self.sale_journal.append(sale))
+
+    def _sales_match(self, outlet_id, filters):
+        match = outlet_match(self.db, outlet_id)
+        match.update({k: v for k, v in filters.items() if k in SALE_FILTERS and v})
+        return match
+
+    def sales_summary(self, outlet_id, **filters):
+        hot, cold = summary_pipelines(self.db, self._sales_match(outlet_id, filters))
+        results = [self.sales.aggregate(hot)]
+        if cold:
+            results.append(self.db[ROLLUP_COLLECTION].aggregate(cold))
+        return merge_summaries(*results)
+
+    def sales_grouped_by(self, outlet_id, field, **filters):
+        hot, cold = grouped_pipelines(self.db, self._sales_match(outlet_id, filters), field)
+        results = [self.sales.aggregate(hot)]
+        if cold:
+            results.append(self.db[ROLLUP_COLLECTION].aggregate(cold))
+        return merge_grouped(["revenue", "count"], *results)
+
+    # --- Users ---
+
+    def find_user(self, username, with_password=False):
+        return self.users.find_one({"username": username}, None if with_password else {"_id": 0, "password": 0})
+
+    def list_users(self):
+        return list(self.users.find({}, {"_id": 0, "password": 0}))
+
+    def count_users(self, **filters):
+        return self.users.count_documents(filters)
+
+    def create_users(self, users):
+        self.users.insert_many(users)
+
+    def users_version(self):
+        meta = self.db.catalog_meta.find_one({"_id": "users"})
+        return meta["version"] if meta else 0
+
+    def update_user(self, username, fields):
+        matched = self.users.update_one({"username": username}, {"$set": fields}).matched_count > 0
+        # Other workers drop their cached users when this changes
+        self.db.catalog_meta.update_one({"_id": "users"}, {"$inc": {"version": 1}}, upsert=True)
+        return matched
+
+    # --- Price logs ---
+
+    def log_price_change(self, log):
+        self.db.price_logs.insert_one(log)
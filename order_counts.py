@@ -0,0 +1,159 @@
+"""Write-behind buffering of menu_items.order_count.
+
+Each worker keeps its pending increments in memory and applies them with a
+single bulk_write every FLUSH_INTERVAL_MS or every FLUSH_MAX_SALES sales,
+and once more at shutdown. If a worker dies with increments still pending,
+`python order_counts.py` recomputes every order_count from the rollups;
+`python rebuild_aggregates.py` rebuilds the rollups themselves from raw sales.
+
+Stop the app before recomputing. Increments still buffered in a worker, or
+sales still in a sale journal, belong to sales the recount already includes
+and would be applied on top of it. The recount is refused while the local
+journal (SALE_JOURNAL_PATH) still holds sales.
+"""
+import os
+import atexit
+import threading
+from collections import Counter
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from dotenv import load_dotenv
+
+from rollups import ROLLUP_COLLECTION, ensure_daily_rollups
+from sale_journal import pending_sales
+from outlets import outlet_ids
+
+load_dotenv()
+
+FLUSH_INTERVAL_MS = int(os.getenv("ORDER_COUNT_FLUSH_MS", 1000))
+FLUSH_MAX_SALES = int(os.getenv("ORDER_COUNT_FLUSH_SALES", 50))
+SALE_JOURNAL_PATH = os.getenv("SALE_JOURNAL_PATH", os.path.join(os.path.abspath(os.path.dirname(__file__)), "sale_journal.db"))
+
+
+class OrderCountBuffer:
+    def __init__(self, collection, interval_ms=FLUSH_INTERVAL_MS, max_sales=FLUSH_MAX_SALES):
+        self.collection = collection
+        self.interval = interval_ms / 1000.0
+        self.max_sales = max_sales
+        self._pending = Counter()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.flush)
+
+    def add(self, item_id, count=1):
+        self._ensure_flusher()
+        with self._lock:
+            self._pending[int(item_id)] += count
+            self._size += count
+            full = self._size >= self.max_sales
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._size = 0
+        if not pending:
+            return 0
+
+        items = list(pending.items())
+        try:
+            self.collection.bulk_write(
+                [UpdateOne({"item_id": item_id}, {"$inc": {"order_count": n}}) for item_id, n in items],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            # The unordered bulk applied every op not listed as failed, so only
+            # the failed ones are kept; re-queueing all would count twice.
+            failed = Counter({items[err["index"]][0]: items[err["index"]][1] for err in e.details.get("writeErrors", [])})
+            self._requeue(failed)
+            print(f"❌ order_count flush failed for {len(failed)} items:", e)
+            return len(items) - len(failed)
+        except PyMongoError as e:
+            # Nothing was acknowledged; keep the increments for the next attempt
+            self._requeue(pending)
+            print("❌ order_count flush failed:", e)
+            return 0
+        return len(items)
+
+    def _requeue(self, pending):
+        with self._lock:
+            self._pending.update(pending)
+            self._size += sum(pending.values())
+
+    def _ensure_flusher(self):
+        # Started lazily (and again after a fork) so each worker process
+        # gets its own flusher thread.
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="order-count-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+
+def rebuild_order_counts(db):
+    # Closed days come from the rollups (which also cover archived sales),
+    # the still-open days from the raw sales collection.
+    backlog = pending_sales(SALE_JOURNAL_PATH)
+    if backlog:
+        print(f"❌ {backlog} sales are still in the sale journal. Stop the app, let the journal drain and run again.")
+        return None
+
+    boundary = ensure_daily_rollups(db)
+    counts = Counter()
+
+    for row in db[ROLLUP_COLLECTION].aggregate([
+        {"$match": {"outlet_id": {"$in": outlet_ids(db)}, "date": {"$lt": boundary}}},
+        {"$group": {"_id": "$item_id", "count": {"$sum": "$count"}}}
+    ]):
+        counts[row["_id"]] += row["count"]
+
+    for row in db.sales.aggregate([
+        {"$match": {"outlet_id": {"$in": outlet_ids(db)}, "date": {"$gte": boundary}}},
+        {"$group": {"_id": {"$toInt": "$item_id"}, "count": {"$sum": 1}}}
+    ]):
+        counts[row["_id"]] += row["count"]
+
+    skipped = write_order_counts(db, counts)
+    if skipped:
+        print(f"⚠️ {len(skipped)} items changed while recomputing and were left as they are: {skipped}")
+    return counts
+
+
+def write_order_counts(db, counts):
+    # Moves every item's order_count to its total (0 for unsold items) in one
+    # bulk_write, as an $inc against a snapshot of the current values. An
+    # item whose count moved after the snapshot (a flush from a worker that
+    # is still running) no longer matches and is left alone rather than
+    # overwritten; those item_ids are returned.
+    snapshot = {item["item_id"]: item.get("order_count")
+                for item in db.menu_items.find({}, {"item_id": 1, "order_count": 1})}
+    ops = {item_id: UpdateOne({"item_id": item_id, "order_count": old},
+                              {"$inc": {"order_count": counts.get(item_id, 0) - (old or 0)}})
+           for item_id, old in snapshot.items() if old is None or old != counts.get(item_id, 0)}
+    if not ops:
+        return []
+    result = db.menu_items.bulk_write(list(ops.values()), ordered=False)
+    if result.matched_count == len(ops):
+        return []
+    return sorted(item["item_id"] for item in db.menu_items.find({"item_id": {"$in": list(ops)}}, {"item_id": 1, "order_count": 1})
+                  if item.get("order_count") != counts.get(item["item_id"], 0))
+
+
+if __name__ == "__main__":
+    client = MongoClient(os.getenv("MONGO_URI"))
+    counts = rebuild_order_counts(client.get_database())
+    if counts is not None:
+        print(f"✅ Recomputed order_count from {sum(counts.values())} sales across {len(counts)} items.")
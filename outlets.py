@@ -0,0 +1,35 @@
+"""Outlet (counter/branch) registry.
+
+Sales, users, rollups and menu overrides all carry an `outlet_id`. Every
+sales index is prefixed by it, so consolidated queries list the outlets
+explicitly instead of scanning across them.
+"""
+import os
+from datetime import datetime
+
+DEFAULT_OUTLET_ID = os.getenv("DEFAULT_OUTLET_ID", "main")
+
+
+def ensure_default_outlet(db):
+    db.outlets.update_one(
+        {"_id": DEFAULT_OUTLET_ID},
+        {"$setOnInsert": {"name": DEFAULT_OUTLET_ID.title(), "created_at": datetime.now()}},
+        upsert=True
+    )
+
+
+def outlet_ids(db):
+    return [o["_id"] for o in db.outlets.find({}, {"_id": 1})]
+
+
+def outlet_match(db, outlet_id=None):
+    # A single outlet, or every registered outlet for consolidated views.
+    if outlet_id:
+        return {"outlet_id": outlet_id}
+    return {"outlet_id": {"$in": outlet_ids(db)}}
+
+
+def backfill_outlet_ids(db):
+    # Records written before multi-outlet support belong to the default outlet.
+    for name in ("sales", "users", "sales_daily"):
+        db[name].update_many({"outlet_id": {"$exists": False}}, {"$set": {"outlet_id": DEFAULT_OUTLET_ID}})
@@ -0,0 +1,181 @@
+"""Price history built from `price_logs`.
+
+Every price change (update_price, menu imports) is logged with the old and
+new price; outlet override changes are logged with their `outlet_id` and the
+override price (None when the outlet follows the menu price). As-of lookups
+read the newest change before a moment per item from the
+(item_id, outlet_id, changed_at) index; the offer-impact report compares the
+units sold before and after each change using the daily rollups.
+"""
+from datetime import timedelta
+
+from rollups import ROLLUP_COLLECTION, rollup_boundary, day_start
+
+IMPACT_WINDOW_DAYS = 7
+
+
+def ensure_price_log_indexes(db):
+    db.price_logs.create_index([("item_id", 1), ("outlet_id", 1), ("changed_at", 1)])
+
+
+def as_of_pipeline(item_ids, when, outlet_id=None):
+    # Newest change before `when` per item. Walking the index backwards lets
+    # $first stop at one entry per item however long the history is.
+    # outlet_id None matches the menu price changes, which carry no outlet.
+    return [
+        {"$match": {"item_id": {"$in": item_ids}, "outlet_id": outlet_id, "changed_at": {"$lt": when}}},
+        {"$sort": {"item_id": -1, "outlet_id": -1, "changed_at": -1}},
+        {"$group": {"_id": "$item_id", "change": {"$first": "$$ROOT"}}}
+    ]
+
+
+def next_change_pipeline(item_ids, when, outlet_id=None):
+    # Oldest change at or after `when`, for items with no earlier change:
+    # its old price is the one that applied at `when`.
+    return [
+        {"$match": {"item_id": {"$in": item_ids}, "outlet_id": outlet_id, "changed_at": {"$gte": when}}},
+        {"$sort": {"item_id": 1, "outlet_id": 1, "changed_at": 1}},
+        {"$group": {"_id": "$item_id", "change": {"$first": "$$ROOT"}}}
+    ]
+
+
+def _changes_around(db, item_ids, when, outlet_id=None):
+    before = {row["_id"]: row["change"] for row in db.price_logs.aggregate(as_of_pipeline(item_ids, when, outlet_id))}
+    missing = [item_id for item_id in item_ids if item_id not in before]
+    after = {row["_id"]: row["change"] for row in db.price_logs.aggregate(
+        next_change_pipeline(missing, when, outlet_id))} if missing else {}
+    return before, after
+
+
+def prices_as_of(db, when, item_ids=None, outlet_id=None):
+    items = {item["item_id"]: item for item in db.menu_items.find(
+        {"item_id": {"$in": item_ids}} if item_ids else {},
+        {"_id": 0, "item_id": 1, "name": 1, "price": 1}
+    )}
+    ids = list(items)
+    before, after = _changes_around(db, ids, when)
+
+    prices = []
+    for item_id, item in sorted(items.items()):
+        if item_id in before:
+            change = before[item_id]
+            entry = {"price": change["new_price"], "is_offer": bool(change.get("is_offer")),
+                     "since": change["changed_at"].strftime("%Y-%m-%d %H:%M")}
+        elif item_id in after:
+            entry = {"price": after[item_id]["old_price"], "is_offer": False, "since": None}
+        else:
+            # Never changed: today's price has always applied
+            entry = {"price": item.get("price"), "is_offer": False, "since": None}
+        prices.append({"item_id": item_id, "name": item["name"], **entry})
+
+    if outlet_id:
+        # An outlet override in effect at `when` replaces the menu price
+        before, after = _changes_around(db, ids, when, outlet_id)
+        current = {o["item_id"]: o for o in db.menu_overrides.find(
+            {"outlet_id": outlet_id, "item_id": {"$in": ids}, "price": {"$exists": True}}, {"_id": 0})}
+        for entry in prices:
+            item_id = entry["item_id"]
+            if item_id in before:
+                price, since = before[item_id]["new_price"], before[item_id]["changed_at"].strftime("%Y-%m-%d %H:%M")
+            elif item_id in after:
+                price, since = after[item_id]["old_price"], None
+            else:
+                # Overrides set before they were logged
+                price, since = current.get(item_id, {}).get("price"), None
+            if price is not None:
+                entry.update({"price": price, "is_offer": False, "since": since, "outlet_override": True})
+    return prices
+
+
+def price_timeline(db, item_id, start=None, end=None, outlet_id=None):
+    # Menu price changes, plus the outlet's override changes when one is given
+    query = {"item_id": item_id, "outlet_id": {"$in": [None, outlet_id]} if outlet_id else None}
+    if start or end:
+        query["changed_at"] = {}
+        if start:
+            query["changed_at"]["$gte"] = start
+        if end:
+            query["changed_at"]["$lt"] = end
+    timeline = []
+    for log in db.price_logs.find(query, {"_id": 0}).sort("changed_at", 1):
+        change = {
+            "changed_at": log["changed_at"].strftime("%Y-%m-%d %H:%M"),
+            "old_price": log.get("old_price"),
+            "new_price": log.get("new_price"),
+            "is_offer": bool(log.get("is_offer")),
+            "reason": log.get("reason", ""),
+            "changed_by": log.get("changed_by", "")
+        }
+        if log.get("outlet_id"):
+            change["outlet_id"] = log["outlet_id"]
+        timeline.append(change)
+    return timeline
+
+
+def daily_units_pipeline(match):
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {"item_id": "$item_id", "date": "$date"},
+            "units": {"$sum": "$count"},
+            "revenue": {"$sum": "$revenue"}
+        }}
+    ]
+
+
+def _window(daily, item_id, start, days):
+    units = revenue = 0
+    for d in range(days):
+        row = daily.get((item_id, (start + timedelta(days=d)).strftime("%Y-%m-%d")))
+        if row:
+            units += row["units"]
+            revenue += row["revenue"]
+    return {"days": days, "units_per_day": round(units / days, 2) if days else 0,
+            "revenue_per_day": round(revenue / days, 2) if days else 0}
+
+
+def offer_impact(db, match, start, end, window_days=IMPACT_WINDOW_DAYS, offers_only=False):
+    # Compares the `window_days` closed days before each change with the days
+    # after it. The day of the change mixes both prices and is left out.
+    # Menu price changes only; override changes apply to a single outlet
+    query = {"outlet_id": None, "changed_at": {"$gte": start, "$lt": end}}
+    if offers_only:
+        query["is_offer"] = True
+    changes = list(db.price_logs.find(query, {"_id": 0}).sort("changed_at", 1))
+    if not changes:
+        return []
+
+    first = day_start(changes[0]["changed_at"]) - timedelta(days=window_days)
+    # Before the first rollup build there are no closed days to compare
+    boundary = rollup_boundary(db) or first
+    last = min(day_start(changes[-1]["changed_at"]) + timedelta(days=window_days + 1), boundary)
+    daily = {}
+    for row in db[ROLLUP_COLLECTION].aggregate(daily_units_pipeline({
+        **match,
+        "item_id": {"$in": list({c["item_id"] for c in changes})},
+        "date": {"$gte": first.strftime("%Y-%m-%d"), "$lt": last.strftime("%Y-%m-%d")}
+    })):
+        daily[(row["_id"]["item_id"], row["_id"]["date"])] = row
+
+    report = []
+    for change in changes:
+        day = day_start(change["changed_at"])
+        after_start = day + timedelta(days=1)
+        after_days = max(0, min(window_days, (boundary - after_start).days))
+        before = _window(daily, change["item_id"], day - timedelta(days=window_days), window_days)
+        after = _window(daily, change["item_id"], after_start, after_days)
+        entry = {
+            "item_id": change["item_id"],
+            "name": change.get("item_name", ""),
+            "changed_at": change["changed_at"].strftime("%Y-%m-%d %H:%M"),
+            "old_price": change.get("old_price"),
+            "new_price": change.get("new_price"),
+            "is_offer": bool(change.get("is_offer")),
+            "before": before,
+            "after": after
+        }
+        if after_days:
+            entry["units_change_pct"] = round((after["units_per_day"] - before["units_per_day"]) / before["units_per_day"] * 100, 1) if before["units_per_day"] else None
+            entry["revenue_change_per_day"] = round(after["revenue_per_day"] - before["revenue_per_day"], 2)
+        report.append(entry)
+    return report
@@ -0,0 +1,178 @@
+import os
+import csv
+import sys
+import json
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+from dotenv import load_dotenv
+
+from outlets import DEFAULT_OUTLET_ID
+
+load_dotenv()
+
+# Same cost factor Flask-Bcrypt uses by default, so app logins verify as usual
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", 12))
+ROLES = ("admin", "staff")
+# Same limits as /api/admin/create-user
+MAX_ADMINS = 2
+MAX_STAFF_PER_OUTLET = 5
+
+
+def hash_password(password):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+
+
+def hash_passwords(passwords, workers=None):
+    # bcrypt is CPU-bound, so spread it over every core
+    if not passwords:
+        return []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return list(pool.map(hash_password, passwords, chunksize=max(1, len(passwords) // 64)))
+
+
+def load_users(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            rows = json.load(f)
+        else:
+            rows = list(csv.DictReader(f))
+    return [{k: (v.strip() if isinstance(v, str) else v) for k, v in row.items()} for row in rows]
+
+
+def validate(rows, rotate=False):
+    errors, seen = [], set()
+    for i, row in enumerate(rows, start=1):
+        username = row.get('username')
+        if not username or not row.get('password'):
+            errors.append(f"Row {i}: username and password are required")
+        elif username in seen:
+            errors.append(f"Row {i}: duplicate username {username} in file")
+        elif not rotate and row.get('role') not in ROLES:
+            errors.append(f"Row {i}: invalid role {row.get('role')!r}")
+        seen.add(username)
+    return errors
+
+
+def check_outlets_and_limits(db, rows):
+    # Users in an unregistered outlet would drop out of every consolidated
+    # query, so they are rejected like the app does. Rows for existing users
+    # are skipped on insert and do not count towards the limits.
+    errors = []
+    outlets = set(o["_id"] for o in db.outlets.find({}, {"_id": 1}))
+    existing = existing_usernames(db.users, rows)
+    new_rows = [row for row in rows if row['username'] not in existing]
+    for row in new_rows:
+        row['outlet_id'] = row.get('outlet_id') or DEFAULT_OUTLET_ID
+        if row['outlet_id'] not in outlets:
+            errors.append(f"{row['username']}: unknown outlet {row['outlet_id']!r}")
+
+    admins = db.users.count_documents({"role": "admin"}) + sum(1 for row in new_rows if row['role'] == 'admin')
+    if admins > MAX_ADMINS:
+        errors.append(f"Would make {admins} admin accounts (maximum {MAX_ADMINS})")
+
+    staff = {}
+    for row in new_rows:
+        if row['role'] == 'staff':
+            staff[row['outlet_id']] = staff.get(row['outlet_id'], 0) + 1
+    for outlet_id, added in sorted(staff.items()):
+        total = db.users.count_documents({"outlet_id": outlet_id, "role": "staff"}) + added
+        if total > MAX_STAFF_PER_OUTLET:
+            errors.append(f"Would make {total} staff accounts in outlet {outlet_id!r} (maximum {MAX_STAFF_PER_OUTLET})")
+    return errors
+
+
+def create_users(users, rows, created_by="system", workers=None):
+    hashes = hash_passwords([row['password'] for row in rows], workers)
+    now = datetime.now()
+    docs = [{
+        "username": row['username'],
+        "password": hashed,
+        "role": row['role'],
+        "outlet_id": row.get('outlet_id') or DEFAULT_OUTLET_ID,
+        "created_by": row.get('created_by') or created_by,
+        "created_at": now,
+        "is_active": True
+    } for row, hashed in zip(rows, hashes)]
+
+    try:
+        result = users.insert_many(docs, ordered=False)
+        return len(result.inserted_ids), []
+    except BulkWriteError as e:
+        conflicts = [docs[err['index']]['username'] for err in e.details['writeErrors'] if err['code'] == 11000]
+        other = [err for err in e.details['writeErrors'] if err['code'] != 11000]
+        if other:
+            raise
+        return e.details['nInserted'], conflicts
+
+
+def existing_usernames(users, rows):
+    return set(u['username'] for u in users.find({"username": {"$in": [r['username'] for r in rows]}}, {"username": 1}))
+
+
+def rotate_passwords(users, rows, workers=None):
+    existing = existing_usernames(users, rows)
+    found = [row for row in rows if row['username'] in existing]
+    missing = [row['username'] for row in rows if row['username'] not in existing]
+    if not found:
+        return 0, missing
+
+    hashes = hash_passwords([row['password'] for row in found], workers)
+    result = users.bulk_write(
+        [UpdateOne({"username": row['username']}, {"$set": {"password": hashed}}) for row, hashed in zip(found, hashes)],
+        ordered=False
+    )
+    return result.matched_count, missing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create users or rotate passwords in bulk from a CSV/JSON file.")
+    parser.add_argument("file", help="CSV with username,password,role[,outlet_id] columns, or a JSON list of the same")
+    parser.add_argument("--rotate", action="store_true", help="Reset passwords of existing users instead of creating them")
+    parser.add_argument("--created-by", default="system")
+    parser.add_argument("--workers", type=int, default=None, help="Hashing processes (default: all cores)")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and report without hashing or writing")
+    args = parser.parse_args()
+
+    rows = load_users(args.file)
+    errors = validate(rows, args.rotate)
+    if errors:
+        for err in errors:
+            print(f"❌ {err}")
+        sys.exit(1)
+
+    client = MongoClient(os.getenv("MONGO_URI"))
+    db = client.get_database()
+    users = db.users
+    users.create_index("username", unique=True)
+
+    if not args.rotate:
+        errors = check_outlets_and_limits(db, rows)
+        if errors:
+            for err in errors:
+                print(f"❌ {err}")
+            sys.exit(1)
+
+    if args.dry_run:
+        existing = existing_usernames(users, rows)
+        action = "rotated" if args.rotate else "created"
+        affected = [r for r in rows if (r['username'] in existing) == args.rotate]
+        print(f"ℹ️ Dry run: {len(affected)} of {len(rows)} users would be {action}.")
+        for r in rows:
+            if r not in affected:
+                print(f"  ⚠️ {r['username']} {'not found' if args.rotate else 'already exists'}")
+        sys.exit(0)
+
+    if args.rotate:
+        updated, missing = rotate_passwords(users, rows, args.workers)
+        print(f"✅ Rotated {updated} passwords.")
+        for username in missing:
+            print(f"  ⚠️ {username} not found")
+    else:
+        created, conflicts = create_users(users, rows, args.created_by, args.workers)
+        print(f"✅ Created {created} users.")
+        for username in conflicts:
+            print(f"  ⚠️ {username} already exists")
@@ -0,0 +1,266 @@
+"""Rebuilds the daily rollups and every order_count from raw sales.
+
+The history (hot `sales` plus the monthly `sales_archive_YYYY_MM`
+collections) is split into months that are aggregated in parallel: each
+month $merges its closed days into a staging rollup collection and returns
+its per-item sale counts. A random sample of days is then re-checked against
+the raw sales and drift against the live values is reported. Only then are
+the staging rollups swapped in with renameCollection and the order counts
+written with one bulk_write.
+
+    python rebuild_aggregates.py --dry-run      # build, verify, report drift
+    python rebuild_aggregates.py --workers 8
+
+Days whose raw sales are gone (archive collection dropped) keep their
+existing rollups, including the days of the boundary month that lie before
+the archive boundary. If a month's rebuilt rollups would hold fewer sales
+than the live ones the swap is refused; pass --allow-drops once the old
+totals are known to be wrong. Do not run this alongside archive_sales.py.
+
+Stop the app first. order_count is rewritten to the recomputed totals, so increments
+still buffered in a worker or sales still in a sale journal would be applied
+on top of them and counted twice. The swap is refused while the local
+journal (SALE_JOURNAL_PATH) still holds sales.
+"""
+import os
+import random
+import argparse
+from collections import Counter
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+from rollups import ROLLUP_COLLECTION, STATE_ID, ensure_rollup_indexes, migrate_rollup_ids, rollup_pipeline, day_start
+from archive_sales import ARCHIVE_PREFIX, archive_collection_name, archived_before
+from order_counts import SALE_JOURNAL_PATH, write_order_counts
+from sale_journal import pending_sales
+from outlets import outlet_ids
+
+load_dotenv()
+
+STAGING_COLLECTION = f"{ROLLUP_COLLECTION}_rebuild"
+SAMPLE_DAYS = int(os.getenv("REBUILD_SAMPLE_DAYS", 20))
+# Caches derived from the rollups, rebuilt lazily on the next request
+DERIVED_CACHES = ("forecasts", "inventory_snapshots")
+
+
+def next_month(day):
+    return day.replace(year=day.year + day.month // 12, month=day.month % 12 + 1)
+
+
+def month_ranges(db):
+    # (start, end) of every month from the oldest sale or rollup through today
+    starts = []
+    first_sale = db.sales.find_one({}, {"timestamp": 1}, sort=[("timestamp", 1)])
+    if first_sale:
+        starts.append(first_sale["timestamp"])
+    archives = sorted(n for n in db.list_collection_names() if n.startswith(ARCHIVE_PREFIX))
+    if archives:
+        starts.append(datetime.strptime(archives[0][len(ARCHIVE_PREFIX):], "%Y_%m"))
+    first_rollup = db[ROLLUP_COLLECTION].find_one({}, {"date": 1}, sort=[("date", 1)])
+    if first_rollup:
+        starts.append(datetime.strptime(first_rollup["date"], "%Y-%m-%d"))
+    if not starts:
+        return [], set()
+
+    current = day_start(min(starts)).replace(day=1)
+    end = day_start(date.today())
+    months = []
+    while current <= end:
+        months.append((current, next_month(current)))
+        current = next_month(current)
+    return months, set(archives)
+
+
+def raw_pipeline(match, archive, stages):
+    # The month's raw sales from the hot collection and its archive
+    pipeline = [{"$match": match}]
+    if archive:
+        pipeline.append({"$unionWith": {"coll": archive, "pipeline": [{"$match": match}]}})
+    return pipeline + stages
+
+
+def count_pipeline():
+    return [{"$group": {"_id": {"$toInt": "$item_id"}, "count": {"$sum": 1}}}]
+
+
+def _rebuild_month(db, outlets, start, end, closed_before, archive, raw_from):
+    # Days from raw_from on are rebuilt from raw sales; earlier days of the
+    # month have no raw sales left (archive collection dropped) and keep
+    # their existing rollups.
+    counts = Counter()
+
+    if start < raw_from:
+        date_range = {"$gte": start.strftime("%Y-%m-%d"), "$lt": raw_from.strftime("%Y-%m-%d")}
+        match = {"outlet_id": {"$in": outlets}, "date": date_range}
+        list(db[ROLLUP_COLLECTION].aggregate([
+            {"$match": match},
+            {"$merge": {"into": STAGING_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ]))
+        for row in db[ROLLUP_COLLECTION].aggregate([
+            {"$match": match}, {"$group": {"_id": "$item_id", "count": {"$sum": "$count"}}}
+        ]):
+            counts[row["_id"]] += row["count"]
+    if raw_from >= end:
+        return counts
+
+    closed_end = min(end, closed_before)
+    if raw_from < closed_end:
+        closed = {"outlet_id": {"$in": outlets}, "timestamp": {"$gte": raw_from, "$lt": closed_end}}
+        list(db.sales.aggregate(
+            raw_pipeline(closed, archive, rollup_pipeline(closed, STAGING_COLLECTION)[1:]), allowDiskUse=True))
+
+    match = {"outlet_id": {"$in": outlets}, "timestamp": {"$gte": raw_from, "$lt": end}}
+    for row in db.sales.aggregate(raw_pipeline(match, archive, count_pipeline()), allowDiskUse=True):
+        counts[row["_id"]] += row["count"]
+    return counts
+
+
+def _verify_day(db, outlets, day, archive):
+    # Staging totals for one closed day must match a fresh scan of its sales
+    day_str = day.strftime("%Y-%m-%d")
+    staged = list(db[STAGING_COLLECTION].aggregate([
+        {"$match": {"outlet_id": {"$in": outlets}, "date": day_str}},
+        {"$group": {"_id": None, "count": {"$sum": "$count"}, "revenue": {"$sum": "$revenue"}}}
+    ]))
+    raw = list(db.sales.aggregate(raw_pipeline(
+        {"outlet_id": {"$in": outlets}, "date": day_str}, archive,
+        [{"$group": {"_id": None, "count": {"$sum": 1}, "revenue": {"$sum": "$price"}}}]
+    )))
+    staged = staged[0] if staged else {"count": 0, "revenue": 0}
+    raw = raw[0] if raw else {"count": 0, "revenue": 0}
+    if staged["count"] != raw["count"] or abs(staged["revenue"] - raw["revenue"]) > 0.01:
+        return {"date": day_str, "staged": staged["count"], "raw": raw["count"]}
+    return None
+
+
+def monthly_totals(collection, outlets):
+    return {(r["_id"]["year"], r["_id"]["month"]): (r["count"], r["revenue"]) for r in collection.aggregate([
+        {"$match": {"outlet_id": {"$in": outlets}}},
+        {"$group": {"_id": {"year": "$year", "month": "$month"}, "count": {"$sum": "$count"}, "revenue": {"$sum": "$revenue"}}}
+    ], allowDiskUse=True)}
+
+
+def drift_report(db, outlets, counts):
+    items = []
+    for item in db.menu_items.find({}, {"_id": 0, "item_id": 1, "name": 1, "order_count": 1}):
+        old, new = item.get("order_count", 0), counts.get(item["item_id"], 0)
+        if old != new:
+            items.append({"item_id": item["item_id"], "name": item["name"], "old": old, "new": new})
+
+    live = monthly_totals(db[ROLLUP_COLLECTION], outlets)
+    staged = monthly_totals(db[STAGING_COLLECTION], outlets)
+    months = []
+    for key in sorted(set(live) | set(staged)):
+        old, new = live.get(key, (0, 0)), staged.get(key, (0, 0))
+        if old[0] != new[0] or abs(old[1] - new[1]) > 0.01:
+            months.append({"month": f"{key[0]}-{key[1]}", "old_count": old[0], "new_count": new[0],
+                           "old_revenue": old[1], "new_revenue": new[1]})
+    return {"order_count": items, "rollups": months}
+
+
+def first_raw_day(start, end, archive, boundary):
+    # First day of the month whose raw sales still exist: before the archive
+    # boundary they only survive in the month's archive collection.
+    if archive or boundary is None or start >= boundary:
+        return start
+    return min(end, boundary)
+
+
+def rebuild_aggregates(db, workers=None, sample_days=SAMPLE_DAYS, dry_run=False, allow_drops=False):
+    # Months without raw sales are carried over as they are, so old-format
+    # buckets must be re-keyed first
+    migrate_rollup_ids(db)
+    outlets = outlet_ids(db)
+    closed_before = day_start(date.today())
+    months, archives = month_ranges(db)
+    if not months:
+        print("ℹ️ No sales to rebuild from.")
+        return None
+
+    boundary = archived_before(db)
+    boundary = day_start(boundary) if boundary else None
+    tasks = []
+    for start, end in months:
+        archive = archive_collection_name(start)
+        archive = archive if archive in archives else None
+        tasks.append((start, end, archive, first_raw_day(start, end, archive, boundary)))
+
+    db[STAGING_COLLECTION].drop()
+    started = datetime.now()
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        partials = list(pool.map(
+            lambda t: _rebuild_month(db, outlets, t[0], t[1], closed_before, t[2], t[3]), tasks))
+    counts = sum(partials, Counter())
+    print(f"✅ Aggregated {len(tasks)} months ({sum(counts.values())} sales) in "
+          f"{(datetime.now() - started).total_seconds():.1f}s with {workers} workers.")
+
+    # Verify a sample of closed, raw-backed days
+    days = [first + timedelta(days=d) for _, end, _, first in tasks
+            for d in range((min(end, closed_before) - first).days)]
+    sample = random.sample(days, min(sample_days, len(days)))
+    archive_for = {start: archive for start, _, archive, _ in tasks}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        mismatches = [m for m in pool.map(
+            lambda day: _verify_day(db, outlets, day, archive_for[day.replace(day=1)]), sample) if m]
+
+    drift = drift_report(db, outlets, counts)
+    print(f"ℹ️ Drift: {len(drift['order_count'])} items' order_count, {len(drift['rollups'])} months of rollups.")
+    for item in drift["order_count"]:
+        print(f"   {item['name']}: {item['old']} -> {item['new']}")
+    for month in drift["rollups"]:
+        print(f"   {month['month']}: {month['old_count']} -> {month['new_count']} sales")
+
+    if mismatches:
+        db[STAGING_COLLECTION].drop()
+        print(f"❌ {len(mismatches)} of {len(sample)} sampled days do not match raw sales (were sales written during the rebuild?):")
+        for m in mismatches:
+            print(f"   {m['date']}: staged {m['staged']}, raw {m['raw']}")
+        return None
+    print(f"✅ {len(sample)} sampled days match raw sales.")
+
+    if dry_run:
+        db[STAGING_COLLECTION].drop()
+        print("ℹ️ Dry run: nothing was changed.")
+        return drift
+
+    # Rebuilt totals only drop when something really was counted twice;
+    # otherwise raw sales have gone missing and the old rollups are the
+    # only record left, so they must not be replaced.
+    drops = [m for m in drift["rollups"] if m["new_count"] < m["old_count"]]
+    if drops and not allow_drops:
+        db[STAGING_COLLECTION].drop()
+        print(f"❌ {len(drops)} months would lose sales from their rollups. Check that no archive collection is "
+              "missing; if the old totals really were double-counted, re-run with --allow-drops.")
+        return None
+
+    backlog = pending_sales(SALE_JOURNAL_PATH)
+    if backlog:
+        db[STAGING_COLLECTION].drop()
+        print(f"❌ {backlog} sales are still in the sale journal. Stop the app, let the journal drain and run again.")
+        return None
+
+    ensure_rollup_indexes(db, STAGING_COLLECTION)
+    db[STAGING_COLLECTION].rename(ROLLUP_COLLECTION, dropTarget=True)
+    db.rollup_state.update_one({"_id": STATE_ID}, {"$max": {"built_before": closed_before.strftime("%Y-%m-%d")}}, upsert=True)
+    skipped = write_order_counts(db, counts)
+    if skipped:
+        print(f"⚠️ {len(skipped)} items changed during the rebuild and kept their order_count: {skipped}")
+    for name in DERIVED_CACHES:
+        db[name].delete_many({})
+    print("✅ Rollups swapped in and order_count rewritten.")
+    return drift
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild rollups and order_count from raw sales.")
+    parser.add_argument("--workers", type=int, default=None, help="Months aggregated at once (default: all cores)")
+    parser.add_argument("--sample-days", type=int, default=SAMPLE_DAYS, help="Days re-checked against raw sales")
+    parser.add_argument("--dry-run", action="store_true", help="Report drift without changing anything")
+    parser.add_argument("--allow-drops", action="store_true", help="Swap in even if some months' rollup totals go down")
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv("MONGO_URI"))
+    rebuild_aggregates(client.get_database(), args.workers, args.sample_days, args.dry_run, args.allow_drops)
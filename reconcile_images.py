@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import MongoClient, UpdateOne
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+UPLOAD_DIR = os.path.join(BASE_DIR, 'static', 'uploads')
+URL_PREFIX = "/static/uploads/"
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def item_id_from_filename(filename):
+    # Uploads are saved as item_<ID>_<original name>
+    parts = filename.split('_')
+    if len(parts) >= 3 and parts[0] == 'item' and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
+
+def scan_uploads(upload_dir, workers=None):
+    names = [n for n in os.listdir(upload_dir) if os.path.isfile(os.path.join(upload_dir, n))]
+    paths = [os.path.join(upload_dir, n) for n in names]
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        hashes = list(pool.map(hash_file, paths))
+    return {
+        name: {"sha256": digest, "mtime": os.path.getmtime(path), "item_id": item_id_from_filename(name)}
+        for name, path, digest in zip(names, paths, hashes)
+    }
+
+
+def compute_diff(items, files):
+    # Newest upload is the candidate when an item has no working image
+    latest = {}
+    for name, info in files.items():
+        item_id = info["item_id"]
+        if item_id is None:
+            continue
+        current = latest.get(item_id)
+        if current is None or (info["mtime"], name) > (files[current]["mtime"], current):
+            latest[item_id] = name
+
+    missing, stale, newer, fixes = [], [], [], {}
+    referenced = set()
+
+    for item in items:
+        item_id = item["item_id"]
+        url = item.get("image_url") or ""
+        wanted = latest.get(item_id)
+        local = url[len(URL_PREFIX):] if url.startswith(URL_PREFIX) else None
+
+        if local is not None and local not in files:
+            missing.append({"item_id": item_id, "image_url": url})
+        if local is None and url:
+            # Externally hosted image; leave it alone
+            continue
+
+        if local is not None and local in files:
+            # The admin's choice stands while its file exists; a newer
+            # upload for the item is only reported
+            if wanted and wanted != local:
+                newer.append({"item_id": item_id, "image_url": url, "candidate": URL_PREFIX + wanted})
+                referenced.add(wanted)
+        elif wanted:
+            stale.append({"item_id": item_id, "image_url": url, "expected": URL_PREFIX + wanted})
+            fixes[item_id] = URL_PREFIX + wanted
+        elif local is not None:
+            fixes[item_id] = ""
+
+        referenced.add(fixes.get(item_id, url)[len(URL_PREFIX):])
+
+    orphaned = sorted(name for name in files if name not in referenced)
+
+    by_hash = {}
+    for name, info in files.items():
+        by_hash.setdefault(info["sha256"], []).append(name)
+    duplicates = [sorted(names) for names in by_hash.values() if len(names) > 1]
+
+    return {
+        "missing": missing,
+        "orphaned": orphaned,
+        "duplicates": duplicates,
+        "stale": stale,
+        "newer": newer,
+        "fixes": [{"item_id": item_id, "image_url": url} for item_id, url in sorted(fixes.items())],
+    }
+
+
+def reconcile_images(db, upload_dir=UPLOAD_DIR, dry_run=False, workers=None):
+    if not os.path.isdir(upload_dir):
+        raise FileNotFoundError(f"{upload_dir} does not exist.")
+
+    files = scan_uploads(upload_dir, workers)
+    items = list(db.menu_items.find({}, {"_id": 0, "item_id": 1, "image_url": 1}))
+    report = compute_diff(items, files)
+
+    report["applied"] = 0
+    if report["fixes"] and not dry_run:
+        result = db.menu_items.bulk_write(
+            [UpdateOne({"item_id": f["item_id"]}, {"$set": {"image_url": f["image_url"]}}) for f in report["fixes"]],
+            ordered=False
+        )
+        report["applied"] = result.modified_count
+    return report
+
+
+def print_report(report, dry_run):
+    print(f"Missing files:   {len(report['missing'])}")
+    for m in report["missing"]:
+        print(f"  ⚠️ Item {m['item_id']} -> {m['image_url']}")
+    print(f"Stale links:     {len(report['stale'])}")
+    for st in report["stale"]:
+        print(f"  🔁 Item {st['item_id']}: {st['image_url'] or '(none)'} -> {st['expected']}")
+    print(f"Newer uploads:   {len(report['newer'])}")
+    for n in report["newer"]:
+        print(f"  🆕 Item {n['item_id']}: keeps {n['image_url']}, newer upload {n['candidate']}")
+    print(f"Orphaned files:  {len(report['orphaned'])}")
+    for name in report["orphaned"]:
+        print(f"  🗑️ {name}")
+    print(f"Duplicate files: {len(report['duplicates'])} groups")
+    for group in report["duplicates"]:
+        print(f"  📎 {', '.join(group)}")
+
+    if dry_run:
+        print(f"\nℹ️ Dry run: {len(report['fixes'])} items would be updated.")
+    else:
+        print(f"\n✨ Reconcile complete. Updated {report['applied']} items.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile menu item images with static/uploads.")
+    parser.add_argument("--dry-run", action="store_true", help="Report differences without updating the database")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--upload-dir", default=UPLOAD_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="Hashing threads")
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv("MONGO_URI"))
+    try:
+        report = reconcile_images(client.get_database(), args.upload_dir, args.dry_run, args.workers)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.dry_run)
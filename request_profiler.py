@@ -0,0 +1,108 @@
+"""Per-request MongoDB round-trip profiling.
+
+A pymongo CommandListener records every command issued while a request is
+being served (pymongo calls listeners on the thread that runs the command,
+so a thread-local trace is enough). app.py turns the trace into a
+Server-Timing header and logs requests that go over the round-trip budget.
+"""
+import time
+import threading
+from contextlib import contextmanager
+from pymongo import monitoring
+
+
+class RequestTrace:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.commands = []
+        self.pending = {}
+        self.phase = "handler"
+        self.phase_ms = {}
+        self.render_started = None
+
+    def add_phase_time(self, name, ms):
+        self.phase_ms[name] = self.phase_ms.get(name, 0.0) + ms
+
+    @property
+    def db_ms(self):
+        return sum(c["ms"] for c in self.commands)
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def describe(self):
+        return [f"{c['command']} {c['collection']} ({c['phase']}, {c['ms']:.1f}ms)" for c in self.commands]
+
+    def server_timing(self):
+        return ", ".join([
+            f'db;dur={self.db_ms:.1f};desc="{len(self.commands)} queries"',
+            f"auth;dur={self.phase_ms.get('auth', 0.0):.1f}",
+            f"render;dur={self.phase_ms.get('render', 0.0):.1f}",
+            f"total;dur={self.total_ms:.1f}",
+        ])
+
+
+class CommandProfiler(monitoring.CommandListener):
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def trace(self):
+        return getattr(self._local, "trace", None)
+
+    def begin(self):
+        self._local.trace = RequestTrace()
+        return self._local.trace
+
+    def end(self):
+        trace, self._local.trace = self.trace, None
+        return trace
+
+    @contextmanager
+    def phase(self, name):
+        trace = self.trace
+        if trace is None:
+            yield
+            return
+        previous, trace.phase = trace.phase, name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            trace.add_phase_time(name, (time.perf_counter() - started) * 1000)
+            trace.phase = previous
+
+    def render_started(self, *args, **kwargs):
+        if self.trace is not None:
+            self.trace.render_started = time.perf_counter()
+
+    def render_finished(self, *args, **kwargs):
+        trace = self.trace
+        if trace is not None and trace.render_started is not None:
+            trace.add_phase_time("render", (time.perf_counter() - trace.render_started) * 1000)
+            trace.render_started = None
+
+    def started(self, event):
+        trace = self.trace
+        if trace is not None:
+            collection = event.command.get(event.command_name)
+            trace.pending[event.request_id] = (event.command_name, collection if isinstance(collection, str) else "")
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        trace = self.trace
+        if trace is None:
+            return
+        command, collection = trace.pending.pop(event.request_id, (event.command_name, ""))
+        trace.commands.append({
+            "command": command,
+            "collection": collection,
+            "phase": trace.phase,
+            "ms": event.duration_micros / 1000.0
+        })
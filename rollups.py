@@ -0,0 +1,234 @@
+"""Daily sales rollups.
+
+One document per (outlet, date, item, hour, payment method, staff member) holding the
+number of sales and the revenue for that bucket. Closed days are rolled up
+once and the dashboards, archival job and reports read these instead of
+re-scanning raw sales.
+
+Rollups are only built by maintenance jobs (`python rollups.py` nightly,
+archive_sales.py, rebuild_aggregates.py). Request handlers read the
+boundary and cover any later days from raw sales.
+"""
+import os
+from datetime import datetime, date
+from pymongo import MongoClient, UpdateOne
+from dotenv import load_dotenv
+
+from outlets import DEFAULT_OUTLET_ID, outlet_ids
+
+load_dotenv()
+
+ROLLUP_COLLECTION = "sales_daily"
+STATE_ID = "sales_daily"
+
+PAYMENT_METHODS = ["Cash", "PhonePe", "UPI"]
+
+
+def ensure_rollup_indexes(db, name=ROLLUP_COLLECTION):
+    db[name].create_index([("outlet_id", 1), ("date", 1)])
+    db[name].create_index([("outlet_id", 1), ("year", 1), ("month", 1)])
+    # Per-item history (price-change impact)
+    db[name].create_index([("outlet_id", 1), ("item_id", 1), ("date", 1)])
+
+
+def migrate_rollup_ids(db):
+    # Buckets built before multi-outlet support have no outlet_id in their
+    # _id, so outlet-aware builds never replace them and they would be counted
+    # next to the new buckets. They are re-keyed to the default outlet; where
+    # a new-format bucket already exists it was built from the same raw sales
+    # and wins. Runs once; the state document records that it is done.
+    state = db.rollup_state.find_one({"_id": STATE_ID}) or {}
+    if state.get("outlet_ids"):
+        return 0
+    old = {"_id.outlet_id": {"$exists": False}}
+    migrated = db[ROLLUP_COLLECTION].count_documents(old)
+    if migrated:
+        list(db[ROLLUP_COLLECTION].aggregate([
+            {"$match": old},
+            {"$set": {"outlet_id": {"$ifNull": ["$outlet_id", DEFAULT_OUTLET_ID]}}},
+            {"$set": {"_id": {
+                "outlet_id": "$outlet_id",
+                "date": "$_id.date",
+                "item_id": "$_id.item_id",
+                "hour": "$_id.hour",
+                "payment_method": "$_id.payment_method",
+                "sold_by": "$_id.sold_by",
+            }}},
+            {"$merge": {"into": ROLLUP_COLLECTION, "on": "_id", "whenMatched": "keepExisting", "whenNotMatched": "insert"}},
+        ]))
+        db[ROLLUP_COLLECTION].delete_many(old)
+        print(f"✅ Re-keyed {migrated} rollup buckets to include outlet_id.")
+    db.rollup_state.update_one({"_id": STATE_ID}, {"$set": {"outlet_ids": True}}, upsert=True)
+    return migrated
+
+
+def day_start(value):
+    if isinstance(value, str):
+        value = datetime.strptime(value, "%Y-%m-%d")
+    if isinstance(value, datetime):
+        value = value.date()
+    return datetime(value.year, value.month, value.day)
+
+
+def rollup_pipeline(match, into=ROLLUP_COLLECTION):
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "outlet_id": "$outlet_id",
+                "date": "$date",
+                "item_id": {"$toInt": "$item_id"},
+                "hour": {"$hour": "$timestamp"},
+                "payment_method": "$payment_method",
+                "sold_by": "$sold_by",
+            },
+            "name": {"$first": "$name"},
+            "category": {"$first": "$category"},
+            "year": {"$first": "$year"},
+            "month": {"$first": "$month"},
+            "time_slot": {"$first": "$time_slot"},
+            "count": {"$sum": 1},
+            "revenue": {"$sum": "$price"},
+        }},
+        {"$set": {
+            "outlet_id": "$_id.outlet_id",
+            "date": "$_id.date",
+            "item_id": "$_id.item_id",
+            "hour": "$_id.hour",
+            "payment_method": "$_id.payment_method",
+            "sold_by": "$_id.sold_by",
+            "day": {"$dateFromString": {"dateString": "$_id.date", "format": "%Y-%m-%d"}},
+        }},
+        {"$merge": {"into": into, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+def build_daily_rollups(db, start, end, source=None):
+    # Rolls up sales with start <= timestamp < end. Buckets are replaced, so
+    # re-running a range is safe as long as the source still holds its sales.
+    source = source if source is not None else db.sales
+    match = {
+        "outlet_id": {"$in": outlet_ids(db)},
+        "timestamp": {"$gte": day_start(start), "$lt": day_start(end)}
+    }
+    list(source.aggregate(rollup_pipeline(match), allowDiskUse=True))
+
+
+def rolled_up_before(db):
+    state = db.rollup_state.find_one({"_id": STATE_ID})
+    return state.get("built_before") if state else None
+
+
+def rollup_boundary(db):
+    # First day not covered by the rollups, or None before the first build.
+    # Never builds anything, so it is safe on the request path.
+    built_before = rolled_up_before(db)
+    return day_start(built_before) if built_before else None
+
+
+def ensure_daily_rollups(db, before=None):
+    # Rolls up every closed day that has not been rolled up yet, up to (but not
+    # including) `before`, which defaults to today. Returns the new boundary.
+    migrate_rollup_ids(db)
+    before = day_start(before or date.today())
+    built_before = rolled_up_before(db)
+
+    if built_before:
+        start = day_start(built_before)
+    else:
+        first = db.sales.find_one({"outlet_id": {"$in": outlet_ids(db)}}, {"timestamp": 1}, sort=[("timestamp", 1)])
+        start = day_start(first["timestamp"]) if first else before
+
+    if start < before:
+        build_daily_rollups(db, start, before)
+
+    boundary = max(start, before).strftime("%Y-%m-%d")
+    db.rollup_state.update_one({"_id": STATE_ID}, {"$max": {"built_before": boundary}}, upsert=True)
+    return boundary
+
+
+def roll_up_late_sales(db, sales):
+    # Sales shipped from a journal after their day was already rolled up
+    # (e.g. an outage across midnight) are added to the existing buckets.
+    # Only sales that were actually inserted may be passed in, so each one is
+    # counted once; archive_sales still moves their raw copies later.
+    today = date.today().strftime("%Y-%m-%d")
+    late = [sale for sale in sales if sale["date"] < today]
+    built_before = rolled_up_before(db) if late else None
+    if not built_before:
+        return 0
+
+    ops = []
+    for sale in late:
+        if sale["date"] >= built_before:
+            continue
+        # Same key order as the $group in rollup_pipeline
+        key = {
+            "outlet_id": sale["outlet_id"],
+            "date": sale["date"],
+            "item_id": int(sale["item_id"]),
+            "hour": sale["timestamp"].hour,
+            "payment_method": sale["payment_method"],
+            "sold_by": sale["sold_by"],
+        }
+        ops.append(UpdateOne({"_id": key}, {
+            "$inc": {"count": 1, "revenue": sale["price"]},
+            "$setOnInsert": {
+                **key,
+                "name": sale.get("name"),
+                "category": sale.get("category"),
+                "year": sale.get("year"),
+                "month": sale.get("month"),
+                "time_slot": sale.get("time_slot"),
+                "day": day_start(sale["date"]),
+            }
+        }, upsert=True))
+    if ops:
+        db[ROLLUP_COLLECTION].bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def summary_group(revenue="$price", count=1):
+    group = {
+        "_id": None,
+        "total_revenue": {"$sum": revenue},
+        "order_count": {"$sum": count},
+    }
+    for method in PAYMENT_METHODS:
+        group[f"{method.lower()}_amount"] = {"$sum": {"$cond": [{"$eq": ["$payment_method", method]}, revenue, 0]}}
+    return {"$group": group}
+
+
+def empty_summary():
+    summary = {"total_revenue": 0, "order_count": 0}
+    for method in PAYMENT_METHODS:
+        summary[f"{method.lower()}_amount"] = 0
+    return summary
+
+
+def merge_summaries(*results):
+    summary = empty_summary()
+    for result in results:
+        for doc in result:
+            for key in summary:
+                summary[key] += doc.get(key, 0)
+    return summary
+
+
+def merge_grouped(value_fields, *results):
+    # Sums numeric fields of documents that share the same `_id` across
+    # several aggregation results (e.g. raw sales + rollups).
+    merged = {}
+    for result in results:
+        for doc in result:
+            current = merged.setdefault(doc["_id"], {"_id": doc["_id"], **{k: 0 for k in value_fields}})
+            for k in value_fields:
+                current[k] += doc.get(k, 0)
+    return list(merged.values())
+
+
+
+if __name__ == "__main__":
+    client = MongoClient(os.getenv("MONGO_URI"))
+    boundary = ensure_daily_rollups(client.get_database())
+    print(f"✅ Daily rollups built for every day before {boundary}.")
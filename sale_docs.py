@@ -0,0 +1,29 @@
+"""Shape of a `sales` document.
+
+Shared by record_sale, the synthetic data generator and the query-plan
+checks so they all write exactly the same fields.
+"""
+
+
+def get_time_slot(hour):
+    if 6 <= hour < 12: return "Morning"
+    if 12 <= hour < 17: return "Afternoon"
+    if 17 <= hour < 22: return "Evening"
+    return "Unknown"
+
+
+def build_sale(item, payment_method, sold_by, outlet_id, when):
+    return {
+        "outlet_id": outlet_id,
+        "item_id": int(item['item_id']),
+        "name": item['name'],
+        "category": item['category'],
+        "price": item['price'],
+        "payment_method": payment_method,
+        "timestamp": when,
+        "date": when.strftime("%Y-%m-%d"),
+        "month": when.strftime("%m"),
+        "year": when.strftime("%Y"),
+        "time_slot": get_time_slot(when.hour),
+        "sold_by": sold_by
+    }
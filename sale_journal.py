@@ -0,0 +1,132 @@
+"""Local write-ahead journal for sales.
+
+record_sale appends the sale to a SQLite file (WAL mode, synchronous=FULL,
+so an acknowledged sale survives a crash or power cut) and returns straight
+away. A background shipper replays the journal into MongoDB in batches.
+Each sale carries its ObjectId from the moment it is journaled, so replaying
+a batch twice (after a crash, or from two workers sharing the file) never
+creates duplicates. Whichever shipper deletes a sale's journal row hands it
+to on_shipped (order_count, late rollups), duplicate or not: a row still in
+the journal has never been counted, even if an earlier insert whose
+acknowledgement was lost already put the sale in MongoDB.
+"""
+import os
+import time
+import sqlite3
+import threading
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError, PyMongoError
+
+SHIP_BATCH_SIZE = int(os.getenv("SALE_JOURNAL_BATCH_SIZE", 500))
+SHIP_INTERVAL_SECONDS = float(os.getenv("SALE_JOURNAL_INTERVAL", 1.0))
+
+
+def pending_sales(path):
+    # Sales still waiting in a journal file, without creating it
+    if not os.path.exists(path):
+        return 0
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM sale_journal").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        conn.close()
+
+
+class SaleJournal:
+    def __init__(self, path, collection, on_shipped=None, batch_size=SHIP_BATCH_SIZE, interval=SHIP_INTERVAL_SECONDS):
+        self.path = path
+        self.collection = collection
+        self.on_shipped = on_shipped
+        self.batch_size = batch_size
+        self.interval = interval
+        self.last_error = None
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS sale_journal (sale_id TEXT PRIMARY KEY, doc TEXT NOT NULL, created_at REAL NOT NULL)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def append(self, sale):
+        sale["_id"] = ObjectId()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO sale_journal (sale_id, doc, created_at) VALUES (?, ?, ?)",
+                (str(sale["_id"]), json_util.dumps(sale), time.time())
+            )
+        self.start()
+        self._wake.set()
+        return sale["_id"]
+
+    def backlog(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sale_journal").fetchone()[0]
+
+    def ship_once(self):
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT sale_id, doc FROM sale_journal ORDER BY rowid LIMIT ?", (self.batch_size,)
+        ).fetchall()
+        if not rows:
+            return 0
+
+        docs = [json_util.loads(doc) for _, doc in rows]
+        try:
+            self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Already in MongoDB from an earlier attempt; anything else is retried
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+
+        # Delete exactly the rows shipped (rowids are reused once the table
+        # empties, so a range delete could remove newer sales). Only the
+        # shipper whose delete removes a row counts that sale, so two workers
+        # sharing the file never count it twice.
+        shipped = []
+        with conn:
+            for (sale_id, _), doc in zip(rows, docs):
+                if conn.execute("DELETE FROM sale_journal WHERE sale_id = ?", (sale_id,)).rowcount:
+                    shipped.append(doc)
+
+        if self.on_shipped and shipped:
+            self.on_shipped(shipped)
+        return len(docs)
+
+    def start(self):
+        # One shipper per process, restarted after a fork
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="sale-journal-shipper", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                shipped = self.ship_once()
+                self.last_error = None
+            except (PyMongoError, sqlite3.Error) as e:
+                shipped = 0
+                if str(e) != self.last_error:
+                    print("❌ Sale journal shipping failed:", e)
+                self.last_error = str(e)
+            if shipped < self.batch_size:
+                self._wake.wait(self.interval)
+                self._wake.clear()
@@ -0,0 +1,95 @@
+"""Sales time series over an arbitrary date range.
+
+Closed days are read from the daily rollups, the still-open days from raw
+sales; both sides bucket with $dateTrunc and the results are merged and
+zero-filled so charts get one complete series per group in a single call.
+"""
+from datetime import timedelta
+
+from rollups import ROLLUP_COLLECTION, rollup_boundary, day_start
+
+GRANULARITIES = ("day", "week", "month")
+GROUP_FIELDS = {
+    "category": "category",
+    "item": "item_id",
+    "staff": "sold_by",
+    "payment": "payment_method",
+}
+
+
+def period_starts(start, end, granularity):
+    # Every bucket start between start and end (inclusive), matching $dateTrunc
+    current = day_start(start)
+    if granularity == "week":
+        current -= timedelta(days=current.weekday())
+    elif granularity == "month":
+        current = current.replace(day=1)
+
+    periods = []
+    while current <= end:
+        periods.append(current)
+        if granularity == "day":
+            current += timedelta(days=1)
+        elif granularity == "week":
+            current += timedelta(days=7)
+        else:
+            current = current.replace(year=current.year + current.month // 12, month=current.month % 12 + 1)
+    return periods
+
+
+def series_pipeline(match, date_field, granularity, group_field, revenue, count):
+    trunc = {"date": f"${date_field}", "unit": granularity}
+    if granularity == "week":
+        trunc["startOfWeek"] = "monday"
+    key = {"period": {"$dateTrunc": trunc}}
+    group = {"_id": key, "revenue": {"$sum": revenue}, "count": {"$sum": count}}
+    if group_field:
+        key["key"] = f"${group_field}"
+        if group_field == "item_id":
+            group["label"] = {"$last": "$name"}
+    return [{"$match": match}, {"$group": group}]
+
+
+def sales_series(db, match, start, end, granularity="day", group_by=None):
+    # start/end are dates; end is inclusive
+    start, end = day_start(start), day_start(end)
+    group_field = GROUP_FIELDS.get(group_by)
+    # Days not rolled up yet come from raw sales
+    boundary = rollup_boundary(db) or start
+
+    rows = []
+    if start < boundary:
+        closed_match = {**match, "date": {
+            "$gte": start.strftime("%Y-%m-%d"),
+            "$lt": min(end + timedelta(days=1), boundary).strftime("%Y-%m-%d")
+        }}
+        rows += db[ROLLUP_COLLECTION].aggregate(
+            series_pipeline(closed_match, "day", granularity, group_field, "$revenue", "$count"))
+    if end >= boundary:
+        open_match = {**match, "timestamp": {"$gte": max(start, boundary), "$lt": end + timedelta(days=1)}}
+        rows += db.sales.aggregate(
+            series_pipeline(open_match, "timestamp", granularity, group_field, "$price", 1))
+
+    periods = period_starts(start, end, granularity)
+    index = {p: i for i, p in enumerate(periods)}
+    series = {}
+    for row in rows:
+        key = row["_id"].get("key", "total") if group_field else "total"
+        entry = series.setdefault(key, {
+            "key": key,
+            "label": row.get("label", key),
+            "revenue": [0] * len(periods),
+            "count": [0] * len(periods)
+        })
+        i = index.get(row["_id"]["period"])
+        if i is not None:
+            entry["revenue"][i] += row["revenue"]
+            entry["count"][i] += row["count"]
+
+    if not series and not group_field:
+        series["total"] = {"key": "total", "label": "total", "revenue": [0] * len(periods), "count": [0] * len(periods)}
+
+    return {
+        "periods": [p.strftime("%Y-%m-%d") for p in periods],
+        "series": sorted(series.values(), key=lambda s: sum(s["revenue"]), reverse=True)
+    }
@@ -0,0 +1,21 @@
+import os
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Sales are partitioned by outlet; within an outlet chunks split on time.
+SALES_SHARD_KEY = {"outlet_id": 1, "timestamp": 1}
+
+def shard_sales():
+    # MONGO_URI must point at a mongos router (e.g. a local test cluster).
+    client = MongoClient(os.getenv("MONGO_URI"))
+    db = client.get_database()
+
+    db.sales.create_index(list(SALES_SHARD_KEY.items()))
+    client.admin.command("enableSharding", db.name)
+    client.admin.command("shardCollection", f"{db.name}.sales", key=SALES_SHARD_KEY)
+    print(f"✅ {db.name}.sales sharded on {SALES_SHARD_KEY}")
+
+if __name__ == "__main__":
+    shard_sales()
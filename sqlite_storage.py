@@ -0,0 +1,338 @@
+"""Embedded SQLite storage backend for single-counter deployments.
+
+Implements the same methods as MongoStorage against one local file, so a
+kiosk records a sale without a network round trip and the tests and
+benchmarks run without any server. WAL mode lets dashboards read while a
+sale is being written, and every statement is a fixed, parameterised SQL
+string, so sqlite3's per-connection statement cache reuses the prepared
+form. Rollups, archives, outlets and the analytics built on them need
+MongoDB and are not available here.
+"""
+import os
+import uuid
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+
+from rollups import PAYMENT_METHODS
+from menu_catalog import diff_menu, diff_writes
+from outlets import DEFAULT_OUTLET_ID
+
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "FULL").upper()
+STATEMENT_CACHE_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS menu_items (
+    item_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    category TEXT NOT NULL,
+    price REAL NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    image_url TEXT NOT NULL DEFAULT '',
+    is_active INTEGER NOT NULL DEFAULT 1,
+    is_offer INTEGER NOT NULL DEFAULT 0,
+    original_price REAL NOT NULL DEFAULT 0,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS menu_items_popularity ON menu_items (is_active, order_count DESC);
+CREATE INDEX IF NOT EXISTS menu_items_category ON menu_items (category, order_count DESC);
+
+CREATE TABLE IF NOT EXISTS sales (
+    sale_id TEXT PRIMARY KEY,
+    outlet_id TEXT NOT NULL,
+    item_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    price REAL NOT NULL,
+    payment_method TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    date TEXT NOT NULL,
+    month TEXT NOT NULL,
+    year TEXT NOT NULL,
+    time_slot TEXT NOT NULL,
+    sold_by TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sales_date ON sales (outlet_id, date);
+CREATE INDEX IF NOT EXISTS sales_year_month ON sales (outlet_id, year, month);
+CREATE INDEX IF NOT EXISTS sales_timestamp ON sales (outlet_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL,
+    outlet_id TEXT NOT NULL,
+    created_by TEXT,
+    created_at TEXT,
+    is_active INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS users_outlet_role ON users (outlet_id, role);
+
+CREATE TABLE IF NOT EXISTS price_logs (
+    log_id INTEGER PRIMARY KEY,
+    item_id INTEGER NOT NULL,
+    item_name TEXT,
+    old_price REAL,
+    new_price REAL,
+    is_offer INTEGER NOT NULL DEFAULT 0,
+    reason TEXT,
+    changed_by TEXT,
+    changed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS price_logs_item ON price_logs (item_id, changed_at);
+
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+MENU_COLUMNS = ("item_id", "name", "category", "price", "description", "image_url", "is_active",
+                "is_offer", "original_price", "order_count", "created_at", "updated_at")
+SALE_COLUMNS = ("sale_id", "outlet_id", "item_id", "name", "category", "price", "payment_method",
+                "timestamp", "date", "month", "year", "time_slot", "sold_by")
+USER_COLUMNS = ("username", "password", "role", "outlet_id", "created_by", "created_at", "is_active")
+PRICE_LOG_COLUMNS = ("item_id", "item_name", "old_price", "new_price", "is_offer", "reason", "changed_by", "changed_at")
+BOOL_COLUMNS = ("is_active", "is_offer")
+MENU_DEFAULTS = {"description": "", "image_url": "", "is_active": True, "is_offer": False, "original_price": 0, "order_count": 0}
+SALE_FILTERS = ("date", "month", "year")
+GROUP_FIELDS = ("sold_by", "time_slot", "payment_method", "category")
+
+SUMMARY_COLUMNS = ", ".join(
+    ["COALESCE(SUM(price), 0) AS total_revenue", "COUNT(*) AS order_count"] +
+    [f"COALESCE(SUM(CASE WHEN payment_method = '{m}' THEN price END), 0) AS {m.lower()}_amount" for m in PAYMENT_METHODS]
+)
+
+
+def _insert_sql(table, columns):
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+INSERT_MENU_ITEM = _insert_sql("menu_items", MENU_COLUMNS)
+INSERT_SALE = _insert_sql("sales", SALE_COLUMNS)
+INSERT_USER = _insert_sql("users", USER_COLUMNS)
+INSERT_PRICE_LOG = _insert_sql("price_logs", PRICE_LOG_COLUMNS)
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="seconds")
+    return value
+
+
+def _row(doc, columns, defaults=None):
+    defaults = defaults or {}
+    return tuple(_value(doc[column] if doc.get(column) is not None else defaults.get(column)) for column in columns)
+
+
+def _doc(row):
+    if row is None:
+        return None
+    doc = dict(row)
+    for column in BOOL_COLUMNS:
+        if column in doc:
+            doc[column] = bool(doc[column])
+    return doc
+
+
+class SQLiteStorage:
+    name = "sqlite"
+    db = None
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        # One connection per thread (and per process after a fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, cached_statements=STATEMENT_CACHE_SIZE)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _all(self, sql, params=()):
+        return [_doc(row) for row in self._conn().execute(sql, params)]
+
+    def _one(self, sql, params=()):
+        return _doc(self._conn().execute(sql, params).fetchone())
+
+    def _write(self, sql, params=()):
+        conn = self._conn()
+        with conn:
+            return conn.execute(sql, params)
+
+    def _set_clause(self, fields, columns):
+        fields = {k: v for k, v in fields.items() if k in columns}
+        return ", ".join(f"{k} = ?" for k in fields), [_value(v) for v in fields.values()]
+
+    def setup(self):
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO catalog_meta (key, version) VALUES ('menu', 0)")
+            conn.execute("INSERT OR IGNORE INTO catalog_meta (key, version) VALUES ('users', 0)")
+
+    def health(self):
+        return {}
+
+    # --- Catalog ---
+
+    def catalog_version(self):
+        row = self._one("SELECT version FROM catalog_meta WHERE key = 'menu'")
+        return row["version"] if row else 0
+
+    def bump_catalog_version(self):
+        self._write("UPDATE catalog_meta SET version = version + 1 WHERE key = 'menu'")
+
+    def sync_menu(self, master_menu):
+        existing = self._all("SELECT item_id, name, is_active FROM menu_items")
+        diff = diff_menu(existing, master_menu, deactivate_missing=False)
+        errors = self.apply_menu_diff({"new": diff["new"], "changed": [], "deactivated": []}, "system")
+        if errors:
+            print("❌ Menu sync failed:", errors[0]["error"])
+            return 0
+        return len(diff["new"])
+
+    def menu_items_for(self, outlet_id, category=None, search=None):
+        # A single counter has no outlet overrides
+        sql, params = "SELECT * FROM menu_items WHERE is_active = 1", []
+        if category and category != 'All':
+            sql += " AND category = ?"
+            params.append(category)
+        if search:
+            if category and category != 'All':
+                sql += " AND name LIKE ?"
+                params.append(f"%{search}%")
+            else:
+                sql += " AND (name LIKE ? OR category LIKE ?)"
+                params += [f"%{search}%", f"%{search}%"]
+        return self._all(sql + " ORDER BY order_count DESC", params)
+
+    def all_menu_items(self, fields=None):
+        columns = [f for f in fields if f in MENU_COLUMNS] if fields else MENU_COLUMNS
+        return self._all(f"SELECT {', '.join(columns)} FROM menu_items ORDER BY item_id")
+
+    def get_item(self, item_id):
+        return self._one("SELECT * FROM menu_items WHERE item_id = ?", (item_id,))
+
+    def lookup_item(self, item_id, outlet_id):
+        return self.get_item(item_id)
+
+    def add_item(self, item):
+        # item_id is the rowid, so SQLite hands out max(item_id) + 1
+        item = {**item, "item_id": None}
+        return self._write(INSERT_MENU_ITEM, _row(item, MENU_COLUMNS, MENU_DEFAULTS)).lastrowid
+
+    def update_item(self, item_id, fields):
+        clause, params = self._set_clause(fields, MENU_COLUMNS)
+        return self._write(f"UPDATE menu_items SET {clause} WHERE item_id = ?", params + [item_id]).rowcount > 0
+
+    def apply_menu_diff(self, diff, changed_by):
+        # One transaction: either the whole diff applies or none of it
+        inserts, updates, logs = diff_writes(diff, changed_by)
+        conn = self._conn()
+        index = 0
+        try:
+            with conn:
+                for index, doc in enumerate(inserts):
+                    conn.execute(INSERT_MENU_ITEM, _row(doc, MENU_COLUMNS, MENU_DEFAULTS))
+                for i, (item_id, fields) in enumerate(updates):
+                    index = len(inserts) + i
+                    clause, params = self._set_clause(fields, MENU_COLUMNS)
+                    conn.execute(f"UPDATE menu_items SET {clause} WHERE item_id = ?", params + [item_id])
+                conn.executemany(INSERT_PRICE_LOG, [_row(log, PRICE_LOG_COLUMNS, {"is_offer": False}) for log in logs.values()])
+        except sqlite3.IntegrityError as e:
+            return [{"index": index, "error": str(e)}]
+        return []
+
+    def outlet_exists(self, outlet_id):
+        return outlet_id == DEFAULT_OUTLET_ID
+
+    # --- Sales ---
+
+    def record_sale(self, sale):
+        sale = {**sale, "sale_id": uuid.uuid4().hex}
+        conn = self._conn()
+        with conn:
+            conn.execute(INSERT_SALE, _row(sale, SALE_COLUMNS))
+            conn.execute("UPDATE menu_items SET order_count = order_count + 1 WHERE item_id = ?", (sale["item_id"],))
+        return sale["sale_id"]
+
+    def import_sales(self, sales):
+        # Bulk load (synthetic data, benchmarks): one transaction per batch
+        counts = Counter(int(sale["item_id"]) for sale in sales)
+        conn = self._conn()
+        with conn:
+            conn.executemany(INSERT_SALE, [_row({**sale, "sale_id": uuid.uuid4().hex}, SALE_COLUMNS) for sale in sales])
+            conn.executemany("UPDATE menu_items SET order_count = order_count + ? WHERE item_id = ?",
+                             [(n, item_id) for item_id, n in counts.items()])
+        return len(sales)
+
+    def _sales_where(self, outlet_id, filters):
+        clauses, params = [], []
+        if outlet_id:
+            clauses.append("outlet_id = ?")
+            params.append(outlet_id)
+        for key in SALE_FILTERS:
+            if filters.get(key):
+                clauses.append(f"{key} = ?")
+                params.append(filters[key])
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def sales_summary(self, outlet_id, **filters):
+        where, params = self._sales_where(outlet_id, filters)
+        return self._one(f"SELECT {SUMMARY_COLUMNS} FROM sales{where}", params)
+
+    def sales_grouped_by(self, outlet_id, field, **filters):
+        if field not in GROUP_FIELDS:
+            raise ValueError(f"Cannot group sales by {field}")
+        where, params = self._sales_where(outlet_id, filters)
+        return self._all(
+            f"SELECT {field} AS _id, SUM(price) AS revenue, COUNT(*) AS count FROM sales{where} GROUP BY {field}", params)
+
+    # --- Users ---
+
+    def find_user(self, username, with_password=False):
+        user = self._one("SELECT * FROM users WHERE username = ?", (username,))
+        if user and not with_password:
+            user.pop("password")
+        return user
+
+    def list_users(self):
+        columns = ", ".join(c for c in USER_COLUMNS if c != "password")
+        return self._all(f"SELECT {columns} FROM users ORDER BY created_at")
+
+    def count_users(self, **filters):
+        clauses = [f"{k} = ?" for k in filters if k in USER_COLUMNS]
+        params = [_value(v) for k, v in filters.items() if k in USER_COLUMNS]
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return self._one(f"SELECT COUNT(*) AS n FROM users{where}", params)["n"]
+
+    def create_users(self, users):
+        conn = self._conn()
+        with conn:
+            conn.executemany(INSERT_USER, [_row(u, USER_COLUMNS, {"outlet_id": DEFAULT_OUTLET_ID, "is_active": True}) for u in users])
+
+    def users_version(self):
+        row = self._one("SELECT version FROM catalog_meta WHERE key = 'users'")
+        return row["version"] if row else 0
+
+    def update_user(self, username, fields):
+        clause, params = self._set_clause(fields, USER_COLUMNS)
+        conn = self._conn()
+        with conn:
+            updated = conn.execute(f"UPDATE users SET {clause} WHERE username = ?", params + [username]).rowcount > 0
+            # Other workers drop their cached users when this changes
+            conn.execute("UPDATE catalog_meta SET version = version + 1 WHERE key = 'users'")
+        return updated
+
+    # --- Price logs ---
+
+    def log_price_change(self, log):
+        self._write(INSERT_PRICE_LOG, _row(log, PRICE_LOG_COLUMNS, {"is_offer": False}))
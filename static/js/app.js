@@ -4,6 +4,14 @@ let allMenuItems = [];
 let pendingSaleItemId = null;
 let activeCategory = 'All';
 let activeSearchQuery = '';
+let catalogVersion = null;
+let catalogOutlet = null;
+let searchDebounceTimer = null;
+
+const CATALOG_DB = 'cafe-pos';
+const CATALOG_STORE = 'catalog';
+const CATALOG_CHECK_INTERVAL = 60000;
+const SEARCH_DEBOUNCE_MS = 150;
 
 // Initialization
 document.addEventListener('DOMContentLoaded', () => {
@@ -11,6 +19,10 @@ document.addEventListener('DOMContentLoaded', () => {
     setInterval(updateDateTime, 1000);
     initFilters();
     loadMenuItems();
+    setInterval(checkCatalogVersion, CATALOG_CHECK_INTERVAL);
+    document.addEventListener('visibilitychange', () => {
+        if (!document.hidden) checkCatalogVersion();
+    });
     setupTooltips();
     setupUploadHandlers();
     initMobileGestures();
@@ -89,20 +101,93 @@ function navigateTo(tabId) {
     }
 }
 
-async function loadMenuItems() {
+// --- Menu Catalog Cache ---
+// The full active catalog is fetched once and kept in memory and IndexedDB,
+// keyed by the server's catalog version. Search and category filters run
+// locally; the catalog is only refetched when the version changes.
+function openCatalogDb() {
+    return new Promise((resolve, reject) => {
+        if (!window.indexedDB) return reject(new Error('IndexedDB unavailable'));
+        const req = indexedDB.open(CATALOG_DB, 1);
+        req.onupgradeneeded = () => req.result.createObjectStore(CATALOG_STORE);
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+    });
+}
+
+async function readCachedCatalog(outletId) {
+    try {
+        const db = await openCatalogDb();
+        return await new Promise((resolve, reject) => {
+            const req = db.transaction(CATALOG_STORE).objectStore(CATALOG_STORE).get(outletId);
+            req.onsuccess = () => resolve(req.result || null);
+            req.onerror = () => reject(req.error);
+        });
+    } catch (e) {
+        return null;
+    }
+}
+
+async function writeCachedCatalog(outletId, version, items) {
+    try {
+        const db = await openCatalogDb();
+        db.transaction(CATALOG_STORE, 'readwrite').objectStore(CATALOG_STORE).put({ version, items }, outletId);
+    } catch (e) { /* cache is best effort */ }
+}
+
+// Returns true when the in-memory catalog changed
+async function refreshCatalog(force = false) {
+    const res = await fetch('/api/menu-items/version');
+    if (!res.ok) throw new Error('Catalog version unavailable');
+    const { version, outlet_id } = await res.json();
+
+    if (!force && version === catalogVersion && outlet_id === catalogOutlet) return false;
+
+    if (!force) {
+        const cached = await readCachedCatalog(outlet_id);
+        if (cached && cached.version === version) {
+            allMenuItems = cached.items;
+            catalogVersion = version;
+            catalogOutlet = outlet_id;
+            return true;
+        }
+    }
+
+    const response = await fetch('/api/menu-items');
+    if (!response.ok) throw new Error('Menu unavailable');
+    allMenuItems = await response.json();
+    catalogVersion = Number(response.headers.get('X-Catalog-Version') ?? version);
+    catalogOutlet = outlet_id;
+    writeCachedCatalog(outlet_id, catalogVersion, allMenuItems);
+    return true;
+}
+
+function checkCatalogVersion() {
+    refreshCatalog()
+        .then(changed => changed && renderMenu(filterCatalog()))
+        .catch(() => { /* keep serving the cached catalog */ });
+}
+
+function filterCatalog() {
+    const q = activeSearchQuery.toLowerCase();
+    return allMenuItems
+        .filter(item => activeCategory === 'All' || item.category === activeCategory)
+        .filter(item => !q
+            || item.name.toLowerCase().includes(q)
+            || (activeCategory === 'All' && item.category.toLowerCase().includes(q)))
+        .sort((a, b) => (b.order_count || 0) - (a.order_count || 0));
+}
+
+async function loadMenuItems(forceRefresh = false) {
     const container = document.getElementById('menu-container');
     if (!container) return;
 
     try {
-        const url = new URL('/api/menu-items', window.location.origin);
-        if (activeCategory !== 'All') url.searchParams.append('category', activeCategory);
-        if (activeSearchQuery) url.searchParams.append('search', activeSearchQuery);
-
-        const response = await fetch(url);
-        const data = await response.json();
-        renderMenu(data);
+        if (forceRefresh || catalogVersion === null) await refreshCatalog(forceRefresh);
+        renderMenu(filterCatalog());
     } catch (error) {
-        showToast('Error loading menu', 'danger');
+        if (allMenuItems.length) renderMenu(filterCatalog());
+        else showToast('Error loading menu', 'danger');
     }
 }
 
@@ -290,7 +375,7 @@ async function saveItemChanges() {
             showToast('Item saved successfully!');
             bootstrap.Modal.getInstance(document.getElementById('itemEditModal')).hide();
             loadAdminItems();
-            loadMenuItems();
+            loadMenuItems(true);
         }
     } catch (e) {
         showToast('Failed to save item', 'danger');
@@ -302,7 +387,7 @@ async function toggleItemStatus(itemId) {
         const response = await fetch(`/api/admin/item/${itemId}`, { method: 'DELETE' });
         if (response.ok) {
             loadAdminItems();
-            loadMenuItems();
+            loadMenuItems(true);
         }
     } catch (e) {
         showToast('Error toggling status', 'danger');
@@ -311,15 +396,18 @@ async function toggleItemStatus(itemId) {
 
 // --- Utilities ---
 function handleSearch(q) {
-    activeSearchQuery = q.trim();
-    loadMenuItems();
+    clearTimeout(searchDebounceTimer);
+    searchDebounceTimer = setTimeout(() => {
+        activeSearchQuery = q.trim();
+        renderMenu(filterCatalog());
+    }, SEARCH_DEBOUNCE_MS);
 }
 
 function filterMenu(cat, el) {
     activeCategory = cat;
     document.querySelectorAll('.category-pill').forEach(p => p.classList.remove('active'));
     el.classList.add('active');
-    loadMenuItems();
+    renderMenu(filterCatalog());
 }
 
 function showToast(msg, type = 'success') {